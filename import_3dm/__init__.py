@@ -45,7 +45,7 @@ from bpy.types import Operator
 
 from typing import Any, Dict
 
-from .read3dm import read_3dm
+from .read3dm import read_3dm, replace_proxies
 
 
 class Import3dm(Operator, ImportHelper):
@@ -76,12 +76,50 @@ class Import3dm(Operator, ImportHelper):
         default=True,
     ) # type: ignore
 
+    curves_as: EnumProperty(
+        items=(("CURVE", "Curves", "Import curves as Blender curves"),
+               ("EDGE_MESH", "Edge Mesh", "Import the curves of each layer with the same material and color as edges of one mesh, sampling free form curves to the chord tolerance")),
+        name="Curves As",
+        description="Choose how curves are imported",
+        default="CURVE",
+    ) # type: ignore
+
+    curve_tolerance: FloatProperty(
+        name="Chord Tolerance",
+        description="Largest distance between a sampled edge and its curve (in millimeters)",
+        default=0.1,
+        min=0.001,
+        max=100.0,
+        precision=3,
+    ) # type: ignore
+
+    merge_curves: BoolProperty(
+        name="Merge Curves",
+        description="Import all curves on the same layer with the same material and color as splines of one curve object",
+        default=False,
+    ) # type: ignore
+
     import_annotations: BoolProperty(
         name="Annotations",
         description="Import annotations.",
         default=True,
     ) # type: ignore
 
+    merge_annotations: BoolProperty(
+        name="Merge Annotations",
+        description="Import the lines and arrowheads of all annotations on the same layer with the same dimension style and color as splines of one curve object",
+        default=False,
+    ) # type: ignore
+
+    annotation_text: EnumProperty(
+        items=(("OBJECTS", "Text Objects", "Import annotation text as text objects"),
+               ("MESH", "Mesh", "Bake annotation text to one mesh per layer, put together from glyphs converted once per character and size"),
+               ("NONE", "None", "Skip annotation text")),
+        name="Annotation Text",
+        description="Choose how annotation text is imported",
+        default="OBJECTS",
+    ) # type: ignore
+
     import_curves: BoolProperty(
         name="Curves",
         description="Import curves.",
@@ -100,6 +138,58 @@ class Import3dm(Operator, ImportHelper):
         default=True,
     ) # type: ignore
 
+    subd_face_budget: IntProperty(
+        name="Face Budget",
+        description="Estimated number of faces all SubDs together may have in the viewport after subdivision",
+        default=2000000,
+        min=0,
+    ) # type: ignore
+
+    subd_max_level: IntProperty(
+        name="Max Level",
+        description="Highest subdivision level given to any SubD",
+        default=3,
+        min=0,
+        max=6,
+    ) # type: ignore
+
+    subd_adaptive: BoolProperty(
+        name="Adaptive Subdivision",
+        description="Enable Cycles adaptive subdivision on SubDs so render detail depends on screen size",
+        default=False,
+    ) # type: ignore
+
+    tessellate_breps: BoolProperty(
+        name="Tessellate Missing Meshes",
+        description="Tessellate Brep faces saved without render mesh, for instance by Save Small. Trimmed faces are skipped when their trim loops are not available",
+        default=True,
+    ) # type: ignore
+
+    tessellation_tolerance: FloatProperty(
+        name="Tessellation Tolerance",
+        description="Largest distance between tessellated triangles and the surface (in millimeters)",
+        default=1.0,
+        min=0.001,
+        max=1000.0,
+        precision=3,
+    ) # type: ignore
+
+    tessellation_angle: FloatProperty(
+        name="Tessellation Angle",
+        description="Largest angle between neighbouring tessellation edges",
+        default=0.349066, # 20deg
+        min=0.0174533,
+        max=1.570796,
+        subtype='ANGLE',
+    ) # type: ignore
+
+    tessellation_time_budget: FloatProperty(
+        name="Tessellation Time Budget",
+        description="Seconds spent at most on tessellation per file, faces left after that stay empty",
+        default=60.0,
+        min=0.0,
+    ) # type: ignore
+
     import_extrusions: BoolProperty(
         name="Extrusions",
         description="Import extrusions.",
@@ -118,6 +208,34 @@ class Import3dm(Operator, ImportHelper):
         default=True,
     ) # type: ignore
 
+    pointcloud_voxel_size: FloatProperty(
+        name="Voxel Size",
+        description="Merge the points of a point cloud within voxels of this size (in millimeters). 0 keeps all points",
+        default=0.0,
+        min=0.0,
+        precision=3,
+    ) # type: ignore
+
+    pointcloud_max_points: IntProperty(
+        name="Max Points",
+        description="Largest number of points per point cloud, larger clouds are reduced with a growing voxel size. 0 means no limit",
+        default=0,
+        min=0,
+    ) # type: ignore
+
+    pointcloud_tiling: BoolProperty(
+        name="Split Into Tiles",
+        description="Import each point cloud as octree tiles, one object per tile in a collection per cloud, so the viewport can cull them",
+        default=False,
+    ) # type: ignore
+
+    pointcloud_tile_points: IntProperty(
+        name="Points per Tile",
+        description="Largest number of points in one tile",
+        default=1000000,
+        min=1000,
+    ) # type: ignore
+
     import_views: BoolProperty(
         name="Standard",
         description="Import standard views (Top, Front, Right, Perspective) as cameras.",
@@ -196,7 +314,66 @@ class Import3dm(Operator, ImportHelper):
         step=0.001,
         precision=3,       # Three digits after decimal
     ) # type: ignore
+
+    weld_engine: EnumProperty(
+        items=(("BMESH", "BMesh", "Merge vertices with BMesh after the mesh is created"),
+               ("NUMPY", "NumPy", "Merge vertices on the vertex buffer before the mesh is created. Brep render meshes are only merged along their face seams, Mesh and Extrusion objects are merged fully")),
+        name="Weld Engine",
+        description="Choose how duplicate vertices are merged",
+        default="BMESH",
+    ) # type: ignore
     
+    import_normals: BoolProperty(
+        name="Use Rhino Normals",
+        description="Import render mesh normals as custom normals. Meshes without coincident vertices are not welded and keep Rhino's shading",
+        default=False,
+    ) # type: ignore
+
+    mesh_detail: EnumProperty(
+        items=(("FULL", "Full", "Import the complete render meshes"),
+               ("BOUNDING_BOX", "Bounding Box", "Import a box around each mesh as stand-in"),
+               ("CONVEX_HULL", "Convex Hull", "Import the convex hull of each mesh as stand-in"),
+               ("CLUSTER", "Decimated", "Import a stand-in decimated by vertex clustering")),
+        name="Mesh Detail",
+        description="Import meshes, Breps and extrusions in full or as cheap stand-ins that can be replaced with the full geometry later",
+        default="FULL",
+    ) # type: ignore
+
+    proxy_resolution: IntProperty(
+        name="Proxy Resolution",
+        description="Number of clustering cells along the longest side of each mesh",
+        default=16,
+        min=1,
+        max=1024,
+    ) # type: ignore
+
+    memory_limit: IntProperty(
+        name="Stream Meshes Larger Than (MB)",
+        description="Single meshes whose estimated import buffers exceed this size are read in chunks, without welding, mesh sharing or stand-ins. This is a threshold, not a memory ceiling: the final vertex, face and UV arrays are still allocated at full size. 0 disables streaming",
+        default=0,
+        min=0,
+    ) # type: ignore
+
+    vertex_color_type: EnumProperty(
+        items=(("FLOAT_COLOR", "Float", "Store vertex colors as 32-bit float per channel"),
+               ("BYTE_COLOR", "Byte", "Store vertex colors as 8-bit sRGB per channel, using a quarter of the memory")),
+        name="Vertex Colors",
+        description="Attribute type used for imported vertex colors",
+        default="FLOAT_COLOR",
+    ) # type: ignore
+
+    mesh_cache: BoolProperty(
+        name="Share Identical Meshes",
+        description="Let objects with identical mesh geometry share one mesh datablock",
+        default=True,
+    ) # type: ignore
+
+    detect_transformed_duplicates: BoolProperty(
+        name="Share Moved Copies",
+        description="Find translated and rotated copies of mesh objects and let them share one mesh datablock. Adds an analysis pass before import",
+        default=False,
+    ) # type: ignore
+
     block_import_mode: EnumProperty(
         items=(("PRESERVE", "Use Existing Definitions", "Keep existing block definitions and add only new blocks (preserves your materials and UV work)"),
                ("FRESH", "Create Fresh Definitions", "Create new block definition collections with fresh geometry for all blocks")),
@@ -223,6 +400,19 @@ class Import3dm(Operator, ImportHelper):
             "import_curves":self.import_curves,
             "import_meshes":self.import_meshes,
             "import_subd":self.import_subd,
+            "tessellate_breps":self.tessellate_breps,
+            "tessellation_tolerance":self.tessellation_tolerance / 1000.0,  # Convert mm to meters
+            "tessellation_angle":self.tessellation_angle,
+            "tessellation_time_budget":self.tessellation_time_budget,
+            "merge_curves":self.merge_curves,
+            "merge_annotations":self.merge_annotations,
+            "annotation_text":self.annotation_text,
+            "pointcloud_voxel_size":self.pointcloud_voxel_size / 1000.0,  # Convert mm to meters
+            "pointcloud_max_points":self.pointcloud_max_points,
+            "pointcloud_tiling":self.pointcloud_tiling,
+            "pointcloud_tile_points":self.pointcloud_tile_points,
+            "curves_as":self.curves_as,
+            "curve_tolerance":self.curve_tolerance / 1000.0,  # Convert mm to meters
             "import_extrusions":self.import_extrusions,
             "import_brep":self.import_brep,
             "import_pointset":self.import_pointset,
@@ -238,6 +428,17 @@ class Import3dm(Operator, ImportHelper):
             "empty_display_size":self.empty_display_size,
             "merge_vertices":self.merge_vertices,
             "merge_distance":self.merge_distance / 1000.0,  # Convert mm to meters
+            "weld_engine":self.weld_engine,
+            "import_normals":self.import_normals,
+            "mesh_detail":self.mesh_detail,
+            "proxy_resolution":self.proxy_resolution,
+            "memory_limit":self.memory_limit,
+            "vertex_color_type":self.vertex_color_type,
+            "subd_face_budget":self.subd_face_budget,
+            "subd_max_level":self.subd_max_level,
+            "subd_adaptive":self.subd_adaptive,
+            "mesh_cache":self.mesh_cache,
+            "detect_transformed_duplicates":self.detect_transformed_duplicates,
             "create_fresh_block_definitions":(self.block_import_mode == "FRESH"),
             "reuse_existing_materials":(self.material_handling != "CREATE_NEW"),
         }
@@ -273,6 +474,15 @@ class Import3dm(Operator, ImportHelper):
             if self.merge_vertices:
                 mesh_box.label(text="Vertex Merge Distance:")
                 mesh_box.prop(self, "merge_distance", text="Distance (mm)")
+                mesh_box.prop(self, "weld_engine")
+            mesh_box.prop(self, "mesh_detail")
+            if self.mesh_detail == "CLUSTER":
+                mesh_box.prop(self, "proxy_resolution")
+            mesh_box.prop(self, "import_normals")
+            mesh_box.prop(self, "memory_limit")
+            mesh_box.prop(self, "vertex_color_type")
+            mesh_box.prop(self, "mesh_cache")
+            mesh_box.prop(self, "detect_transformed_duplicates")
         
         # Other geometry types in grid layout
         row = box.row()
@@ -281,9 +491,39 @@ class Import3dm(Operator, ImportHelper):
         row = box.row()
         row.prop(self, "import_subd")
         row.prop(self, "import_curves")
+        if self.import_brep:
+            brep_box = box.box()
+            brep_box.prop(self, "tessellate_breps")
+            if self.tessellate_breps:
+                brep_box.prop(self, "tessellation_tolerance", text="Tolerance (mm)")
+                brep_box.prop(self, "tessellation_angle")
+                brep_box.prop(self, "tessellation_time_budget", text="Time Budget (s)")
+        if self.import_subd:
+            subd_box = box.box()
+            subd_box.prop(self, "subd_face_budget")
+            subd_box.prop(self, "subd_max_level")
+            subd_box.prop(self, "subd_adaptive")
+        if self.import_curves:
+            curve_box = box.box()
+            curve_box.prop(self, "curves_as")
+            if self.curves_as == "EDGE_MESH":
+                curve_box.prop(self, "curve_tolerance", text="Chord Tolerance (mm)")
+            else:
+                curve_box.prop(self, "merge_curves")
         row = box.row()
         row.prop(self, "import_annotations")
         row.prop(self, "import_pointset")
+        if self.import_annotations:
+            annotation_box = box.box()
+            annotation_box.prop(self, "merge_annotations")
+            annotation_box.prop(self, "annotation_text")
+        if self.import_pointset:
+            points_box = box.box()
+            points_box.prop(self, "pointcloud_voxel_size", text="Voxel Size (mm)")
+            points_box.prop(self, "pointcloud_max_points")
+            points_box.prop(self, "pointcloud_tiling")
+            if self.pointcloud_tiling:
+                points_box.prop(self, "pointcloud_tile_points")
 
         box = layout.box()
         box.label(text="📦 Blocks")
@@ -323,19 +563,43 @@ class Import3dm(Operator, ImportHelper):
 
         # Advanced section removed as merge_distance moved to Objects panel
 
+class Replace3dmProxies(Operator):
+    """Replace selected Rhino stand-ins with their full geometry, read again from the .3dm file they were imported from"""
+    bl_idname = "import_3dm.replace_proxies"
+    bl_label = "Replace Rhino Stand-ins"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context : bpy.types.Context):
+        return any(ob.get("rhproxy", None) for ob in context.selected_objects)
+
+    def execute(self, context : bpy.types.Context):
+        replaced = replace_proxies(context, context.selected_objects, {})
+        self.report({'INFO'}, f"Replaced {replaced} stand-ins with full geometry")
+        return {'FINISHED'}
+
+
 # Only needed if you want to add into a dynamic menu
 def menu_func_import(self, _ : bpy.types.Context):
     self.layout.operator(Import3dm.bl_idname, text="Rhinoceros 3D (.3dm)")
 
 
+def menu_func_object(self, _ : bpy.types.Context):
+    self.layout.operator(Replace3dmProxies.bl_idname)
+
+
 def register():
     bpy.utils.register_class(Import3dm)
+    bpy.utils.register_class(Replace3dmProxies)
     bpy.types.TOPBAR_MT_file_import.append(menu_func_import)
+    bpy.types.VIEW3D_MT_object.append(menu_func_object)
 
 
 def unregister():
     bpy.utils.unregister_class(Import3dm)
+    bpy.utils.unregister_class(Replace3dmProxies)
     bpy.types.TOPBAR_MT_file_import.remove(menu_func_import)
+    bpy.types.VIEW3D_MT_object.remove(menu_func_object)
 
 
 if __name__ == "__main__":
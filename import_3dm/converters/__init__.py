@@ -23,20 +23,25 @@
 import rhino3dm as r3d
 import bpy
 from bpy import context
+from mathutils import Matrix
 
 import uuid
+import json
 
 from typing import Any, Dict
 
 from .material import handle_materials, material_name, DEFAULT_RHINO_MATERIAL
 from .layers import handle_layers
-from .render_mesh import import_render_mesh
-from .curve import import_curve
+from .render_mesh import import_render_mesh, clear_mesh_cache, mesh_cache_stats, find_transformed_duplicates
+from .curve import import_curve, import_curve_batch, curve_id_for_spline
+from .linework import import_edge_mesh
 from .views import handle_views
 from .groups import handle_groups
 from .instances import import_instance_reference, handle_instance_definitions, populate_instance_definitions
-from .pointcloud import import_pointcloud
-from .annotation import import_annotation
+from .pointcloud import import_pointcloud, import_pointcloud_tiles
+from .annotation import import_annotation, import_annotation_batch, clear_text_cache, clear_dimstyle_cache, flush_arrows
+from .text import import_text_mesh, clear_glyph_cache
+from .subd import add_subd_modifier, apply_subd_levels
 
 from . import utils
 
@@ -62,9 +67,45 @@ def initialize(
     # Initialize fresh dictionary structure without existing objects
     # This prevents object sharing between different import sessions
     utils.init_fresh_dict(context)
+    clear_mesh_cache()
+    clear_text_cache()
+    clear_dimstyle_cache()
+    clear_glyph_cache()
 
 def cleanup() -> None:
     utils.clear_all_dict()
+    clear_mesh_cache()
+    clear_text_cache()
+    clear_dimstyle_cache()
+    clear_glyph_cache()
+
+# import options the full geometry of a stand-in is built with, kept on
+# the stand-in so replace_proxy gives the same result as a full import
+PROXY_OPTIONS = (
+    "merge_vertices",
+    "merge_distance",
+    "weld_engine",
+    "import_normals",
+    "vertex_color_type",
+    "memory_limit",
+    "mesh_cache",
+    "tessellate_breps",
+    "tessellation_tolerance",
+    "tessellation_angle",
+    "tessellation_time_budget",
+)
+
+def material_link(options : Dict[str, Any]) -> str:
+    """
+    Material slot link from the options, resolving PREFERENCES to the
+    user preference.
+    """
+    link_materials_to = options.get("link_materials_to", "PREFERENCES")
+    if link_materials_to == "PREFERENCES":
+        link_materials_to = bpy.context.preferences.edit.material_link
+        if link_materials_to == 'OBDATA':
+            link_materials_to = 'DATA'
+    return link_materials_to
 
 # TODO: Decouple object data creation from object creation
 #       and consolidate object-level conversion.
@@ -84,7 +125,6 @@ def convert_object(
     """
 
     update_materials = options.get("update_materials", False)
-    link_materials_to = options.get("link_materials_to", "PREFERENCES")
     data = None
     blender_object = None
 
@@ -103,20 +143,27 @@ def convert_object(
 
     tags = utils.create_tag_dict(ob.Attributes.Id, ob.Attributes.Name)
     if data is not None:
-        data.materials.clear()
-        data.materials.append(rhinomat)
+        # mesh data shared with earlier objects through the mesh cache
+        # keeps its material, a different one is set on the object slot
+        shared_data = data.users > 0
+        if not shared_data:
+            data.materials.clear()
+            data.materials.append(rhinomat)
         print(f"Object '{name}' getting material: {rhinomat.name}")
         blender_object = utils.get_or_create_iddata(context.blend_data.objects, tags, data)
-        if link_materials_to == "PREFERENCES":
-            link_materials_to = bpy.context.preferences.edit.material_link
-            if link_materials_to == 'OBDATA':
-                link_materials_to = 'DATA'
+        link_materials_to = material_link(options)
         for slot in blender_object.material_slots:
             slot.link = link_materials_to
+        if shared_data and data.materials[0] != rhinomat:
+            blender_object.material_slots[0].link = 'OBJECT'
+            blender_object.material_slots[0].material = rhinomat
 
         if text_curve:
             text_tags = utils.create_tag_dict(uuid.uuid1(), f"TXT{ob.Attributes.Name}")
-            text_curve[0].materials.append(rhinomat)
+            # text curves are shared between annotations, the material
+            # is set on the object slot
+            if not text_curve[0].materials:
+                text_curve[0].materials.append(rhinomat)
             text_object = utils.get_or_create_iddata(context.blend_data.objects, text_tags, text_curve[0])
             text_object.material_slots[0].link = 'OBJECT'
             text_object.material_slots[0].material = rhinomat
@@ -129,16 +176,28 @@ def convert_object(
 
     blender_object.color = [x/255. for x in view_color]
 
+    # transformed duplicates share mesh data in their pose normalized
+    # frame, put them back in place
+    pose = options.get("pose_instances", {}).get(str(ob.Attributes.Id), None)
+    if pose is not None and data is not None:
+        blender_object.matrix_world = Matrix(pose[1].tolist())
+
+    # stand-ins remember where their full geometry comes from, see
+    # replace_proxy
+    if data is not None and data.get("rhproxy", None):
+        blender_object["rhproxy"] = data["rhproxy"]
+        blender_object["rhfile"] = options.get("filepath", "")
+        blender_object["rhoptions"] = json.dumps({key: options[key] for key in PROXY_OPTIONS if key in options})
+        if pose is not None:
+            blender_object["rhpose"] = pose[1].ravel().tolist()
+
     if ob.Geometry.ObjectType == r3d.ObjectType.InstanceReference and options.get("import_instances",False):
         import_instance_reference(context, ob, blender_object, name, scale, options)
 
-    # If subd, apply subdivision modifier
+    # If subd, apply subdivision modifier. Levels are set once all SubDs
+    # are imported, see apply_subd_levels
     if ob.Geometry.ObjectType == r3d.ObjectType.SubD:
-        if blender_object.modifiers.find("SubD") == -1:
-            level = 3
-            blender_object.modifiers.new(type="SUBSURF", name="SubD")
-            blender_object.modifiers["SubD"].levels = level
-            blender_object.modifiers["SubD"].render_levels = level
+        add_subd_modifier(blender_object, options)
 
     # Import Rhino user strings
     for pair in ob.Attributes.GetUserStrings():
@@ -159,3 +218,172 @@ def convert_object(
                 layer.objects.link(text_object)
         except Exception:
             pass
+
+
+def convert_curve_batch(
+        context     : bpy.types.Context,
+        obs,
+        layer       : bpy.types.Collection,
+        rhinomat    : bpy.types.Material,
+        view_color,
+        scale       : float,
+        options     : Dict[str, Any]):
+    """
+    Add one new object holding all curves in obs as splines of a
+    single curve, link to collection given by layer
+    """
+    name = f"{layer.name} Curves"
+    data = import_curve_batch(context, obs, name, scale, options)
+    return _add_batch_object(context, data, name, layer, rhinomat, view_color, options)
+
+
+def convert_edge_mesh(
+        context     : bpy.types.Context,
+        obs,
+        layer       : bpy.types.Collection,
+        rhinomat    : bpy.types.Material,
+        view_color,
+        scale       : float,
+        options     : Dict[str, Any]):
+    """
+    Add one new object holding all curves in obs as edges of a single
+    mesh, link to collection given by layer
+    """
+    name = f"{layer.name} Linework"
+    data = import_edge_mesh(context, obs, name, scale, options)
+    return _add_batch_object(context, data, name, layer, rhinomat, view_color, options)
+
+
+def convert_annotation_batch(
+        context     : bpy.types.Context,
+        obs,
+        layer       : bpy.types.Collection,
+        rhinomat    : bpy.types.Material,
+        view_color,
+        scale       : float,
+        options     : Dict[str, Any]):
+    """
+    Add one new object holding the lines and arrowheads of all
+    annotations in obs as splines of a single curve, link to collection
+    given by layer. Text objects are parented to it.
+    """
+    name = f"{layer.name} Annotations"
+    data, texts = import_annotation_batch(context, obs, name, scale, options)
+    blender_object = _add_batch_object(context, data, name, layer, rhinomat, view_color, options)
+
+    for ob, (text_curve, matrix) in texts:
+        text_tags = utils.create_tag_dict(uuid.uuid1(), f"TXT{ob.Attributes.Name}")
+        if not text_curve.materials:
+            text_curve.materials.append(rhinomat)
+        text_object = utils.get_or_create_iddata(context.blend_data.objects, text_tags, text_curve)
+        text_object.material_slots[0].link = 'OBJECT'
+        text_object.material_slots[0].material = rhinomat
+        text_object.parent = blender_object
+        text_object.matrix_world = matrix
+        layer.objects.link(text_object)
+
+    return blender_object
+
+
+def convert_text_mesh(
+        context     : bpy.types.Context,
+        texts,
+        layer       : bpy.types.Collection,
+        rhinomat    : bpy.types.Material,
+        view_color,
+        options     : Dict[str, Any]):
+    """
+    Add one new object holding the annotation text collected for a
+    layer baked to mesh, link to collection given by layer
+    """
+    name = f"{layer.name} Text"
+    data = import_text_mesh(context, texts, name)
+    return _add_batch_object(context, data, name, layer, rhinomat, view_color, options)
+
+
+def _add_batch_object(context, data, name, layer, rhinomat, view_color, options):
+    data.materials.append(rhinomat)
+
+    tags = utils.create_tag_dict(uuid.uuid1(), name)
+    blender_object = utils.get_or_create_iddata(context.blend_data.objects, tags, data)
+    link_materials_to = material_link(options)
+    for slot in blender_object.material_slots:
+        slot.link = link_materials_to
+        slot.material = rhinomat
+    blender_object.color = [x/255. for x in view_color]
+
+    layer.objects.link(blender_object)
+    return blender_object
+
+
+def convert_pointcloud_tiles(
+        context     : bpy.types.Context,
+        ob          : r3d.File3dmObject,
+        name        : str,
+        layer       : bpy.types.Collection,
+        rhinomat    : bpy.types.Material,
+        view_color,
+        scale       : float,
+        options     : Dict[str, Any]):
+    """
+    Add a point cloud as one object per tile, collected in a new
+    collection named after the cloud that is linked to layer. All tile
+    objects are tagged with the id of the cloud.
+    """
+    tags = utils.create_tag_dict(ob.Attributes.Id, ob.Attributes.Name)
+    collection = context.blend_data.collections.new(name=name)
+    utils.tag_data(collection, tags)
+    layer.children.link(collection)
+
+    link_materials_to = material_link(options)
+    for data in import_pointcloud_tiles(context, ob, name, scale, options):
+        data.materials.append(rhinomat)
+        blender_object = context.blend_data.objects.new(data.name, data)
+        utils.tag_data(blender_object, tags)
+        for slot in blender_object.material_slots:
+            slot.link = link_materials_to
+            slot.material = rhinomat
+        blender_object.color = [x/255. for x in view_color]
+        for pair in ob.Attributes.GetUserStrings():
+            blender_object[pair[0]] = pair[1]
+        collection.objects.link(blender_object)
+
+    return collection
+
+
+def replace_proxy(
+        context         : bpy.types.Context,
+        ob              : r3d.File3dmObject,
+        blender_object  : bpy.types.Object,
+        scale           : float,
+        options         : Dict[str, Any]) -> None:
+    """
+    Swap the stand-in mesh of blender_object for the full render mesh
+    or point cloud of ob, keeping materials and the object transform.
+    The import options stored on the stand-in are used, entries in
+    options override them.
+    """
+    proxy_data = blender_object.data
+    options = dict(json.loads(blender_object.get("rhoptions", "{}")), **options)
+
+    # moved copies were imported in their pose normalized frame, their
+    # mesh is transformed and so can't be shared
+    pose = blender_object.get("rhpose", None)
+    if ob.Geometry.ObjectType == r3d.ObjectType.PointSet:
+        data = import_pointcloud(context, ob, proxy_data.name, scale, dict(options, pointcloud_voxel_size=0.0, pointcloud_max_points=0))
+    else:
+        mesh_options = dict(options, mesh_detail="FULL", mesh_cache=options.get("mesh_cache", True) and pose is None)
+        data = import_render_mesh(context, ob, proxy_data.name, scale, mesh_options)
+    if pose is not None:
+        data.transform(Matrix([pose[i:i + 4] for i in range(0, 16, 4)]).inverted())
+
+    if data.users == 0:
+        for material in proxy_data.materials:
+            data.materials.append(material)
+    blender_object.data = data
+
+    for key in ("rhproxy", "rhfile", "rhpose", "rhoptions"):
+        if key in blender_object:
+            del blender_object[key]
+    if proxy_data.users == 0:
+        context.blend_data.meshes.remove(proxy_data)
@@ -24,9 +24,11 @@
 import rhino3dm as r3d
 from . import utils
 from . import curve
+from . import nurbs
 
 from mathutils import Matrix
 import math
+import numpy as np
 
 from enum import IntEnum, auto
 import bpy
@@ -38,6 +40,100 @@ class PartType(IntEnum):
 CONVERT = {}
 
 
+# *** text curve cache
+#
+# Annotations repeating the same text in the same style share one text
+# curve datablock, only the object matrix differs.
+
+_text_cache = dict()
+
+def clear_text_cache() -> None:
+    global _text_cache
+    _text_cache = dict()
+
+
+# *** dimension style cache
+#
+# Dimension styles are looked up once per import and their parameters
+# resolved, arrowhead outlines are computed once per arrow type.
+
+class DimStyle:
+    """
+    Resolved parameters of a dimension style. style is the rhino3dm
+    DimensionStyle for calls that need it, lengths are in model units,
+    text_size is the Blender text size.
+    """
+    __slots__ = ("style", "id", "arrow_type1", "arrow_type2", "leader_arrow_type",
+                 "arrow_length", "extension_extension", "extension_offset", "text_size")
+
+    def __init__(self, style : r3d.DimensionStyle, scale : float):
+        self.style = style
+        self.id = str(style.Id)
+        self.arrow_type1 = style.ArrowType1
+        self.arrow_type2 = style.ArrowType2
+        self.leader_arrow_type = style.LeaderArrowType
+        self.arrow_length = style.ArrowLength
+        self.extension_extension = style.ExtensionLineExtension
+        self.extension_offset = style.ExtensionLineOffset
+        # for now only use blender built-in font. Scale that down to
+        # 0.8 since it is a bit larger than Rhino default Arial
+        self.text_size = style.TextHeight * scale * 0.8
+
+
+_dimstyle_cache = dict()
+_arrow_templates = dict()
+_pending_arrows = list()
+# splines added by the converters so far, merged annotations use it to
+# find their spline ranges without asking Blender for the spline count,
+# which walks the whole spline list
+_spline_count = 0
+
+def clear_dimstyle_cache() -> None:
+    global _dimstyle_cache, _pending_arrows
+    _dimstyle_cache = dict()
+    _pending_arrows = list()
+
+
+def _dimstyle(model : r3d.File3dm, dimstyle_id, scale : float) -> DimStyle:
+    key = (str(dimstyle_id), scale)
+    dimstyle = _dimstyle_cache.get(key, None)
+    if dimstyle is None:
+        dimstyle = DimStyle(model.DimStyles.FindId(dimstyle_id), scale)
+        _dimstyle_cache[key] = dimstyle
+    return dimstyle
+
+
+def _arrow_template(arrtype) -> np.ndarray:
+    # arrowhead outlines are the same for every dimension style as
+    # long as they are requested at size 1.0
+    template = _arrow_templates.get(arrtype, None)
+    if template is None:
+        points = r3d.Arrowhead.GetPoints(arrtype, 1.0)
+        template = np.array([(p.X, p.Y) for p in points], dtype=np.float64).reshape(-1, 2)
+        _arrow_templates[arrtype] = template
+    return template
+
+
+def flush_arrows() -> None:
+    """
+    Write the points of all arrowheads added since the last flush. The
+    templates of all arrows are moved onto their tip planes in one
+    NumPy transform.
+    """
+    global _pending_arrows
+    if not _pending_arrows:
+        return
+    splines, templates, frames = zip(*_pending_arrows)
+    counts = np.array([len(t) for t in templates])
+    uv = np.concatenate(templates)
+    frames = np.repeat(np.array(frames), counts, axis=0)
+    co = np.ones((len(uv), 4), dtype=np.float32)
+    co[:, :3] = frames[:, 0] + uv[:, :1] * frames[:, 1] + uv[:, 1:] * frames[:, 2]
+    for spline, block in zip(splines, np.split(co, np.cumsum(counts)[:-1])):
+        spline.points.foreach_set("co", block.ravel())
+    _pending_arrows = list()
+
+
 class Arrow(IntEnum):
     Arrow1 = auto()
     Arrow2 = auto()
@@ -45,13 +141,24 @@ class Arrow(IntEnum):
     Leader2 = auto() # used in angular for second arrow
 
 
-def _arrowtype_from_arrow(dimstyle : r3d.DimensionStyle, arrow : Arrow):
+def _new_spline(bc, kind : str):
+    global _spline_count
+    _spline_count += 1
+    return bc.splines.new(kind)
+
+
+def _add_nurbs_curve(nc, bc, scale : float, is_arc=False):
+    global _spline_count
+    _spline_count += curve.import_nurbs_curve(nc, bc, scale, is_arc=is_arc)
+
+
+def _arrowtype_from_arrow(dimstyle : DimStyle, arrow : Arrow):
     if arrow == Arrow.Arrow1:
-        return dimstyle.ArrowType1
+        return dimstyle.arrow_type1
     elif arrow == Arrow.Arrow2:
-        return dimstyle.ArrowType2
+        return dimstyle.arrow_type2
     elif arrow in (Arrow.Leader, Arrow.Leader2):
-        return dimstyle.LeaderArrowType
+        return dimstyle.leader_arrow_type
 
 
 def _negate_vector3d(v : r3d.Vector3d):
@@ -67,14 +174,10 @@ def _rotate_plane_to_line(plane : r3d.Plane, line : r3d.Line, addangle=0.0):
     return plane
 
 
-def _add_arrow(dimstyle : r3d.DimensionStyle, pt : PartType, plane : r3d.Plane, bc, tip : r3d.Point3d, tail : r3d.Point3d, arrow : Arrow, scale : float):
+def _add_arrow(dimstyle : DimStyle, pt : PartType, plane : r3d.Plane, bc, tip : r3d.Point3d, tail : r3d.Point3d, arrow : Arrow, scale : float):
     arrtype = _arrowtype_from_arrow(dimstyle, arrow)
-    arrowhead_points = r3d.Arrowhead.GetPoints(arrtype, 1.0)
-    arrowhead = bc.splines.new('POLY')
-    arrowhead.use_cyclic_u = True
-    arrowhead.points.add(len(arrowhead_points)-1)
     l = r3d.Line(tip, tail)
-    arrowLength = dimstyle.ArrowLength
+    arrowLength = dimstyle.arrow_length
     inside = arrowLength * 2 < l.Length if arrow not in (Arrow.Leader, Arrow.Leader2) else True
 
     tip_plane = r3d.Plane(tip, plane.XAxis, plane.YAxis)
@@ -93,23 +196,28 @@ def _add_arrow(dimstyle : r3d.DimensionStyle, pt : PartType, plane : r3d.Plane,
             tip_plane = tip_plane.Rotate(math.pi, tip_plane.ZAxis)
 
     if inside:
-        for i in range(0, len(arrowhead_points)):
-            uv = arrowhead_points[i]
-            p = tip_plane.PointAt(uv.X, uv.Y)
-            arrowhead.points[i].co = (p.X * scale, p.Y * scale, p.Z * scale, 1)
-
-
-def _populate_line(dimstyle : r3d.DimensionStyle, pt : PartType, plane : r3d.Plane, bc, pt1 : r3d.Point3d, pt2 : r3d.Point3d, scale : float):
+        # the points are written by flush_arrows, together with all
+        # other arrows
+        template = _arrow_template(arrtype)
+        arrowhead = _new_spline(bc, 'POLY')
+        arrowhead.use_cyclic_u = True
+        arrowhead.points.add(len(template)-1)
+        o, x, y = tip_plane.Origin, tip_plane.XAxis, tip_plane.YAxis
+        frame = ((o.X * scale, o.Y * scale, o.Z * scale), (x.X * scale, x.Y * scale, x.Z * scale), (y.X * scale, y.Y * scale, y.Z * scale))
+        _pending_arrows.append((arrowhead, template, frame))
+
+
+def _populate_line(dimstyle : DimStyle, pt : PartType, plane : r3d.Plane, bc, pt1 : r3d.Point3d, pt2 : r3d.Point3d, scale : float):
     rhl = r3d.Line(pt1, pt2)
     if rhl.Length < 1e-6:
         return
-    line = bc.splines.new('POLY')
+    line = _new_spline(bc, 'POLY')
     line.points.add(1)
 
     # create line between given points
     if pt == PartType.ExtensionLine:
-        ext = dimstyle.ExtensionLineExtension
-        offset = dimstyle.ExtensionLineOffset
+        ext = dimstyle.extension_extension
+        offset = dimstyle.extension_offset
         extfr = 1.0 + ext / rhl.Length if rhl.Length > 0 else 0.0
         offsetfr = offset / rhl.Length if rhl.Length > 0 else 0.0
         pt1 = rhl.PointAt(offsetfr)
@@ -122,20 +230,33 @@ def _populate_line(dimstyle : r3d.DimensionStyle, pt : PartType, plane : r3d.Pla
     line.points[1].co = (pt2.X, pt2.Y, pt2.Z, 1)
 
 
-def _add_text(dimstyle : r3d.DimensionStyle, plane : r3d.Plane, bc, pt : r3d.Point3d, txt : str, scale : float, left=False, textob=False):
-    textcurve = bpy.context.blend_data.curves.new(name="annotation_text", type="FONT")
-    textcurve.body = txt
-    # for now only use blender built-in font. Scale that down to
-    # 0.8 since it is a bit larger than Rhino default Arial
-    textcurve.size = dimstyle.TextHeight * scale * 0.8
-    textcurve.align_x = 'CENTER' if not left else 'LEFT'
+def _text_curve(dimstyle : DimStyle, txt : str, size : float, align_x : str, align_y : str):
+    key = (txt, size, align_x, align_y, dimstyle.id)
+    textcurve = _text_cache.get(key, None)
+    if textcurve is None:
+        textcurve = bpy.context.blend_data.curves.new(name="annotation_text", type="FONT")
+        textcurve.body = txt
+        textcurve.size = size
+        textcurve.align_x = align_x
+        textcurve.align_y = align_y
+        _text_cache[key] = textcurve
+    return textcurve
+
+
+def _add_text(dimstyle : DimStyle, plane : r3d.Plane, bc, pt : r3d.Point3d, txt : str, scale : float, left=False, textob=False):
+    # the text itself is only created once the text mode is known, see
+    # _resolve_text. Return the arguments for _text_curve and the
+    # placement matrix
+    size = dimstyle.text_size
+    if not textob:
+        text = (dimstyle, txt, size, 'CENTER' if not left else 'LEFT', 'TOP_BASELINE')
+    else:
+        text = (dimstyle, txt, size, 'CENTER', 'TOP')
     pt *= scale
     plane = r3d.Plane(pt, plane.XAxis, plane.YAxis)
     if not textob:
         xform = r3d.Transform.PlaneToPlane(r3d.Plane.WorldXY(), plane)
     else:
-        textcurve.align_x = 'CENTER'
-        textcurve.align_y = 'TOP'
         plane = plane.Rotate(math.pi, plane.ZAxis)
         trl = r3d.Transform.Translation(0.0, -0.05, 0.00)
         xform = r3d.Transform.Multiply(trl, r3d.Transform.PlaneToPlane(r3d.Plane.WorldXY(), plane))
@@ -155,15 +276,33 @@ def _add_text(dimstyle : r3d.DimensionStyle, plane : r3d.Plane, bc, pt : r3d.Poi
             q = rote.to_quaternion()
             bm = Matrix.LocRotScale(loc, q, sca)
 
-    return (textcurve, bm)
+    return (text, bm)
+
+
+def _resolve_text(ob, text, options):
+    """
+    Turn the text returned by the annotation converters into a
+    (text curve, matrix) pair according to the annotation_text option,
+    None when no text object is wanted. Text baked to mesh is collected
+    per layer in options["text_meshes"], see import_text_mesh. Text of
+    block definitions is not baked, as it is not linked to its layer.
+    """
+    mode = options.get("annotation_text", "OBJECTS")
+    if text is None or mode == "NONE":
+        return None
+    if mode == "MESH" and not ob.Attributes.IsInstanceDefinitionObject:
+        texts = options.setdefault("text_meshes", dict()).setdefault(ob.Attributes.LayerIndex, [])
+        texts.append((str(ob.Attributes.Id), text[0][1:], text[1]))
+        return None
+    return (_text_curve(*text[0]), text[1])
 
 
 def import_dim_linear(model, dimlin, bc, scale):
     pts = dimlin.Points
     txt = dimlin.PlainText
-    dimstyle = model.DimStyles.FindId(dimlin.DimensionStyleId)
+    dimstyle = _dimstyle(model, dimlin.DimensionStyleId, scale)
     p = dimlin.Plane
-    displines = dimlin.GetDisplayLines(dimstyle)
+    displines = dimlin.GetDisplayLines(dimstyle.style)
 
     for displine in displines["lines"]:
         _populate_line(dimstyle, PartType.DimensionLine, p, bc, displine.From, displine.To, scale)
@@ -180,9 +319,9 @@ CONVERT[r3d.AnnotationTypes.Rotated] = import_dim_linear
 def import_radius(model, dimrad, bc, scale):
     pts = dimrad.Points
     txt = dimrad.PlainText
-    dimstyle = model.DimStyles.FindId(dimrad.DimensionStyleId)
+    dimstyle = _dimstyle(model, dimrad.DimensionStyleId, scale)
     p = dimrad.Plane
-    displines = dimrad.GetDisplayLines(dimstyle)
+    displines = dimrad.GetDisplayLines(dimstyle.style)
 
     for displine in displines["lines"]:
         _populate_line(dimstyle, PartType.DimensionLine, p, bc, displine.From, displine.To, scale)
@@ -200,8 +339,8 @@ def import_angular(model, dimang, bc, scale):
     r = dimang.Radius
     a = dimang.Angle
     txt = dimang.PlainText
-    dimstyle = model.DimStyles.FindId(dimang.DimensionStyleId)
-    displines = dimang.GetDisplayLines(dimstyle)
+    dimstyle = _dimstyle(model, dimang.DimensionStyleId, scale)
+    displines = dimang.GetDisplayLines(dimstyle.style)
     p = dimang.Plane
 
     for line in displines["lines"]:
@@ -217,13 +356,13 @@ def import_angular(model, dimang, bc, scale):
 
     for arc in displines["arcs"]:
         nc_arc = arc.ToNurbsCurve()
-        curve.import_nurbs_curve(nc_arc, bc, scale, is_arc=True)
+        _add_nurbs_curve(nc_arc, bc, scale, is_arc=True)
     arc = displines["arcs"][0]
 
     # calculate the arrow tail points. These points we can pass
     # on to the arrow import function to ensure they are in a
     # mostly correct orientation.
-    arrowLength = dimstyle.ArrowLength
+    arrowLength = dimstyle.arrow_length
     arclen = arc.Length
 
     T0 = nc_arc.Domain.T0
@@ -233,8 +372,9 @@ def import_angular(model, dimang, bc, scale):
     lenfrac = domlen / arclen
     arr_frac = arrowLength / domlen * lenfrac
 
-    endpt1 = nc_arc.PointAt(T0 + arr_frac)
-    endpt2 = nc_arc.PointAt(T1 - arr_frac)
+    ends = nurbs.evaluate(nurbs.from_rhino(nc_arc), (T0 + arr_frac, T1 - arr_frac))
+    endpt1 = r3d.Point3d(*ends[0])
+    endpt2 = r3d.Point3d(*ends[1])
 
     """
     # Debug code adding empties for end points
@@ -268,9 +408,9 @@ CONVERT[r3d.AnnotationTypes.Angular3pt] = import_angular
 
 def import_leader(model, dimlead, bc, scale):
     txt = dimlead.PlainText
-    dimstyle = model.DimStyles.FindId(dimlead.DimensionStyleId)
+    dimstyle = _dimstyle(model, dimlead.DimensionStyleId, scale)
     pts = dimlead.Points
-    textptuv = dimlead.GetTextPoint2d(dimstyle, 1.0)
+    textptuv = dimlead.GetTextPoint2d(dimstyle.style, 1.0)
     textpt = dimlead.Plane.PointAt(textptuv.X, textptuv.Y)
 
     for i in range(0, len(pts)-1):
@@ -286,7 +426,7 @@ CONVERT[r3d.AnnotationTypes.Leader] = import_leader
 
 def import_text(model, textannotation, bc, scale):
     txt = textannotation.PlainText
-    dimstyle = model.DimStyles.FindId(textannotation.DimensionStyleId)
+    dimstyle = _dimstyle(model, textannotation.DimensionStyleId, scale)
     textpt = textannotation.Plane.Origin
 
     return _add_text(dimstyle, textannotation.Plane, bc, textpt, txt, scale, left=False, textob=True)
@@ -295,10 +435,10 @@ CONVERT[r3d.AnnotationTypes.Text] = import_text
 
 def import_ordinate(model, dimordinate, bc, scale):
     txt = dimordinate.PlainText
-    dimstyle = model.DimStyles.FindId(dimordinate.DimensionStyleId)
+    dimstyle = _dimstyle(model, dimordinate.DimensionStyleId, scale)
     pts = dimordinate.Points
     textplane = dimordinate.Plane
-    displines = dimordinate.GetDisplayLines(dimstyle)
+    displines = dimordinate.GetDisplayLines(dimstyle.style)
     l = r3d.Line(pts["kinkpt1"], pts["defpt"])
     textplane = _rotate_plane_to_line(textplane, l)
 
@@ -312,8 +452,8 @@ CONVERT[r3d.AnnotationTypes.Ordinate] = import_ordinate
 
 
 def import_centermark(model, centermark, bc, scale):
-    dimstyle = model.DimStyles.FindId(centermark.DimensionStyleId)
-    lines = centermark.GetDisplayLines(dimstyle)
+    dimstyle = _dimstyle(model, centermark.DimensionStyleId, scale)
+    lines = centermark.GetDisplayLines(dimstyle.style)
     for line in lines:
         _populate_line(dimstyle, PartType.DimensionLine, centermark.Plane, bc, line.From, line.To, scale)
 
@@ -336,8 +476,46 @@ def import_annotation(context, ob, name, scale, options):
     curve_data.fill_mode = 'BOTH'
 
     if og.AnnotationType in CONVERT:
-        text = CONVERT[og.AnnotationType](model, og, curve_data, scale)
+        text = _resolve_text(ob, CONVERT[og.AnnotationType](model, og, curve_data, scale), options)
     else:
         print(f"Annotation type {og.AnnotationType} not implemented")
 
     return (curve_data, text)
+
+
+def import_annotation_batch(context, obs, name, scale, options):
+    """
+    Import the annotations in obs as splines of a single curve datablock.
+    Which splines came from which annotation is kept in the rhcurve_ids
+    and rhcurve_splines custom properties, see curve_id_for_spline.
+
+    Returns the curve and a list of (annotation, text) for the
+    annotations that have text.
+    """
+    model = options.get("rh_model", None)
+    curve_data = context.blend_data.curves.new(name, type="CURVE")
+    curve_data.dimensions = '2D'
+    curve_data.fill_mode = 'BOTH'
+    texts = []
+    if not model:
+        return (curve_data, texts)
+
+    ids = []
+    starts = []
+    first = _spline_count
+    for ob in obs:
+        og = ob.Geometry
+        if og.AnnotationType not in CONVERT:
+            print(f"Annotation type {og.AnnotationType} not implemented")
+            continue
+        ids.append(str(ob.Attributes.Id))
+        starts.append(_spline_count - first)
+        text = _resolve_text(ob, CONVERT[og.AnnotationType](model, og, curve_data, scale), options)
+        if text is not None:
+            texts.append((ob, text))
+    starts.append(_spline_count - first)
+
+    curve_data["rhcurve_ids"] = ",".join(ids)
+    curve_data["rhcurve_splines"] = starts
+
+    return (curve_data, texts)
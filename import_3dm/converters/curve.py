@@ -26,13 +26,19 @@ from  . import utils
 
 from mathutils import Vector
 from mathutils.geometry import intersect_line_line
+import numpy as np
+from bisect import bisect_right
+from itertools import chain
 
+# every converter returns the number of splines it added to bcurve,
+# so merged curves don't need to ask Blender for the spline count, which
+# walks the whole spline list
 CONVERT = {}
 
 def import_null(rcurve, bcurve, scale):
 
     print("Failed to convert type", type(rcurve))
-    return None
+    return 0
 
 def import_line(rcurve, bcurve, scale):
 
@@ -45,7 +51,7 @@ def import_line(rcurve, bcurve, scale):
     line.points[0].co = (fr.x, fr.y, fr.z, 1)
     line.points[1].co = (to.x, to.y, to.z, 1)
 
-    return line
+    return 1
 
 CONVERT[r3d.LineCurve] = import_line
 
@@ -60,30 +66,26 @@ def import_polyline(rcurve, bcurve, scale):
         N -= 1
 
     polyline.points.add(N - 1)
-    for i in range(0, N):
-        rpt = rcurve.Point(i)
-        polyline.points[i].co = (rpt.X * scale, rpt.Y * scale, rpt.Z * scale, 1)
+    co = np.ones((N, 4), dtype=np.float32)
+    co[:, :3] = polyline_points(rcurve, N) * scale
+    polyline.points.foreach_set("co", co.ravel())
+
+    return 1
 
 
 CONVERT[r3d.PolylineCurve] = import_polyline
 
 def import_nurbs_curve(rcurve, bcurve, scale, is_arc = False):
-    # create a list of points where
-    # we ensure we don't have duplicates. Rhino curves
-    # may have duplicate points, which Blender doesn't like
-    seen_pts = set()
-    pts = list()
-    for _p in rcurve.Points:
-        p = (_p.X, _p.Y, _p.Z, _p.W)
-        if not p in seen_pts:
-            pts.append(_p)
-            seen_pts.add(p)
+    # gather the points and ensure we don't have duplicates,
+    # keeping the first of each. Rhino curves may have duplicate
+    # points, which Blender doesn't like
+    pts = utils.points_to_array(rcurve.Points, len(rcurve.Points), 4)
+    _, first = np.unique(pts, axis=0, return_index=True)
+    pts = pts[np.sort(first)]
     N = len(pts)
 
     nurbs = bcurve.splines.new('NURBS')
 
-    N = len(pts)
-
     # creating a new spline already adds one point, so add
     # here only N-1 points
     nurbs.points.add(N - 1)
@@ -95,18 +97,11 @@ def import_nurbs_curve(rcurve, bcurve, scale, is_arc = False):
     if rcurve.IsRational:
         if rcurve.IsClosed:
             is_arc = True
-        _pts = pts[:]
-        pts = list()
-        for _p in _pts:
-            w = 1 / _p.W
-            p3d = r3d.Point3d(_p.X, _p.Y, _p.Z) * w
-            pts.append(r3d.Point4d(p3d.X, p3d.Y, p3d.Z, _p.W))
-
+        pts[:, :3] /= pts[:, 3:]
 
     # add the CVs to the Blender NURBS curve
-    for i in range(0, N):
-        rpt = pts[i]
-        nurbs.points[i].co = (rpt.X * scale, rpt.Y * scale, rpt.Z * scale, rpt.W)
+    pts[:, :3] *= scale
+    nurbs.points.foreach_set("co", pts.astype(np.float32).ravel())
 
     # set relevant properties
     nurbs.resolution_u = 12
@@ -123,6 +118,8 @@ def import_nurbs_curve(rcurve, bcurve, scale, is_arc = False):
     nurbs.use_cyclic_v = False
     nurbs.order_v = 1
 
+    return 1
+
 
 CONVERT[r3d.NurbsCurve] = import_nurbs_curve
 
@@ -130,19 +127,30 @@ def point_to_vector(point) -> Vector:
     return Vector((point.X, point.Y, point.Z))
 
 
+def polyline_points(rcurve, count : int) -> np.ndarray:
+    """
+    Gather the first count points of a PolylineCurve into a (count, 3)
+    array.
+    """
+    it = chain.from_iterable((p.X, p.Y, p.Z) for p in map(rcurve.Point, range(count)))
+    return np.fromiter(it, dtype=np.float64, count=count * 3).reshape(count, 3)
+
+
 def import_arc(rcurve, bcurve, scale):
     nc_arc = rcurve.Arc.ToNurbsCurve()
-    import_nurbs_curve(nc_arc, bcurve, scale, is_arc=True)
+    return import_nurbs_curve(nc_arc, bcurve, scale, is_arc=True)
 
 
 CONVERT[r3d.ArcCurve] = import_arc
 
 def import_polycurve(rcurve, bcurve, scale):
 
+    count = 0
     for seg in range(rcurve.SegmentCount):
         segcurve = rcurve.SegmentCurve(seg)
         if type(segcurve) in CONVERT.keys():
-            CONVERT[type(segcurve)](segcurve, bcurve, scale)
+            count += CONVERT[type(segcurve)](segcurve, bcurve, scale)
+    return count
 
 CONVERT[r3d.PolyCurve] = import_polycurve
 
@@ -158,3 +166,46 @@ def import_curve(context, ob, name, scale, options):
         CONVERT[type(og)](og, curve_data, scale)
 
     return curve_data
+
+
+def import_curve_batch(context, obs, name, scale, options):
+    """
+    Import the curves of obs as splines of one curve datablock. Which
+    splines came from which Rhino curve is kept in the rhcurve_ids and
+    rhcurve_splines custom properties, see curve_id_for_spline.
+    """
+    curve_data = context.blend_data.curves.new(name, type="CURVE")
+    curve_data.dimensions = '3D'
+    curve_data.resolution_u = 12
+
+    ids = list()
+    starts = list()
+    count = 0
+    for ob in obs:
+        og = ob.Geometry
+        if type(og) not in CONVERT.keys():
+            continue
+        ids.append(str(ob.Attributes.Id))
+        starts.append(count)
+        count += CONVERT[type(og)](og, curve_data, scale)
+    starts.append(count)
+
+    # ID properties can't hold lists of strings
+    curve_data["rhcurve_ids"] = ",".join(ids)
+    curve_data["rhcurve_splines"] = starts
+
+    return curve_data
+
+
+def curve_id_for_spline(curve_data, index : int, starts_key : str = "rhcurve_splines"):
+    """
+    Return the id of the Rhino curve spline index of a merged curve
+    datablock was created from, None if unknown. For edge meshes pass
+    rhcurve_edges as starts_key and an edge index.
+    """
+    ids = curve_data.get("rhcurve_ids", "")
+    starts = list(curve_data.get(starts_key, []))
+    i = bisect_right(starts, index) - 1
+    if not ids or i < 0 or i >= len(starts) - 1:
+        return None
+    return ids.split(",")[i]
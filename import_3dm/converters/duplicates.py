@@ -0,0 +1,174 @@
+# MIT License
+
+# Copyright (c) 2018-2024 Nathan Letwory, Joel Putnam, Tom Svilans, Lukas Fertig
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# *** pose normalized signatures for translated/rotated duplicates
+
+import hashlib
+import numpy as np
+from bisect import bisect_left, bisect_right
+
+# relative eigenvalue gap and third moment below which a PCA axis is
+# considered ambiguous
+_EIGEN_GAP = 1e-4
+_SKEW_EPS = 1e-6
+
+
+def _pca_axes(p : np.ndarray):
+    """
+    Principal axes of the centered points p as rows, largest variance
+    first, with signs fixed by the third moment along each axis. Returns
+    None for (near) symmetric point sets where the frame is ambiguous.
+    """
+    w, v = np.linalg.eigh(p.T @ p / len(p))
+    w = w[::-1]
+    axes = v[:, ::-1].T.copy()
+    if w[0] <= 0.0 or (w[0] - w[1]) < _EIGEN_GAP * w[0] or (w[1] - w[2]) < _EIGEN_GAP * w[0]:
+        return None
+    proj = p @ axes[:2].T
+    skew = (proj ** 3).sum(axis=0)
+    if np.any(np.abs(skew) < _SKEW_EPS * (np.abs(proj) ** 3).sum(axis=0)):
+        return None
+    axes[:2] *= np.sign(skew)[:, None]
+    axes[2] = np.cross(axes[0], axes[1])
+    return axes
+
+
+def _anchored_axes(p : np.ndarray):
+    """
+    Frame spanned by the first vertices, in index order, that lie far
+    from the centroid. Copies of a part keep their vertex order, so this
+    resolves the symmetric cases PCA cannot.
+    """
+    d = np.linalg.norm(p, axis=1)
+    if d.max() <= 0.0:
+        return None
+    i = np.argmax(d > 0.5 * d.max())
+    a0 = p[i] / d[i]
+    orth = p - np.outer(p @ a0, a0)
+    od = np.linalg.norm(orth, axis=1)
+    if od.max() <= 1e-9 * d.max():
+        return None
+    j = np.argmax(od > 0.5 * od.max())
+    a1 = orth[j] / od[j]
+    return np.array([a0, a1, np.cross(a0, a1)])
+
+
+def pose_frame(vertices : np.ndarray):
+    """
+    Move vertices into a frame given by their centroid and principal
+    axes. Returns (canonical, matrix, method) where matrix is the 4x4
+    numpy matrix placing the canonical vertices at their original
+    location, or None when no stable frame exists.
+    """
+    if len(vertices) < 3:
+        return None
+    centroid = vertices.mean(axis=0)
+    p = vertices - centroid
+    axes = _pca_axes(p)
+    method = b"pca"
+    if axes is None:
+        axes = _anchored_axes(p)
+        method = b"anchored"
+    if axes is None:
+        return None
+
+    matrix = np.identity(4)
+    matrix[:3, :3] = axes.T
+    matrix[:3, 3] = centroid
+    return (p @ axes.T, matrix, method)
+
+
+def topology_key(buffers, method : bytes, salt = ()) -> bytes:
+    """
+    Hash everything of MeshBuffers a rigid transform leaves untouched:
+    face buffers, texture coordinates and colors. Copies of a part
+    share this key, their vertices still need comparing.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(method)
+    h.update(repr((len(buffers.vertices), salt)).encode())
+    h.update(np.ascontiguousarray(buffers.loop_vertices).data)
+    h.update(np.ascontiguousarray(buffers.loop_totals).data)
+    for c in buffers.coords:
+        h.update(np.ascontiguousarray(c).data)
+    if buffers.colors is not None:
+        h.update(np.ascontiguousarray(buffers.colors).data)
+    return h.digest()
+
+
+def _radius(canonical : np.ndarray) -> float:
+    # root mean square distance from the centroid, pose invariant
+    return float(np.sqrt(np.einsum('ij,ij->', canonical, canonical) / len(canonical)))
+
+
+class DuplicateFinder:
+    """
+    Group meshes that are translated and/or rotated copies of each other.
+    Meshes are bucketed by topology_key. Within a bucket the groups are
+    sorted by the radius of their first mesh, and the canonical vertices
+    are only compared with groups whose radius is within reach of the
+    tolerance. Distinct parts of the same topology, like panels of
+    different sizes, thus don't compare with each other.
+    """
+    def __init__(self):
+        self.buckets = dict()
+
+    def add(self, name, buffers, tolerance : float, salt = ()) -> None:
+        frame = pose_frame(buffers.vertices)
+        if frame is None:
+            return
+        canonical, matrix, method = frame
+        key = topology_key(buffers, method, salt)
+        radii, groups = self.buckets.setdefault(key, ([], []))
+        # vertices within tolerance per coordinate keep the radius
+        # within sqrt(3) * tolerance
+        radius = _radius(canonical)
+        window = np.sqrt(3.0) * tolerance
+        for i in range(bisect_left(radii, radius - window), bisect_right(radii, radius + window)):
+            reference, members = groups[i]
+            if np.abs(reference - canonical).max() <= tolerance:
+                members.append((name, matrix))
+                return
+        i = bisect_right(radii, radius)
+        radii.insert(i, radius)
+        groups.insert(i, (canonical.astype(np.float32), [(name, matrix)]))
+
+    def duplicates(self):
+        """
+        Return a dictionary mapping the name of every mesh having at least
+        one copy to (group key, matrix).
+        """
+        found = dict()
+        for key, (_, groups) in self.buckets.items():
+            for index, (_, members) in enumerate(groups):
+                if len(members) < 2:
+                    continue
+                for name, matrix in members:
+                    found[name] = (key + index.to_bytes(4, "little"), matrix)
+        return found
+
+
+def to_pose_frame(vertices : np.ndarray, matrix : np.ndarray) -> np.ndarray:
+    """
+    Move vertices into the pose normalized frame of matrix.
+    """
+    return (vertices - matrix[:3, 3]) @ matrix[:3, :3]
@@ -24,6 +24,8 @@ import bpy
 import rhino3dm as r3d
 from mathutils import Matrix, Vector
 from math import sqrt
+import re
+import time
 from . import utils
 from . import material
 
@@ -129,27 +131,45 @@ def import_instance_reference(context : bpy.context, ob : r3d.File3dmObject, ire
     iref.matrix_world = Matrix(xform)
 
 
-def _reassign_materials_to_block_objects(parent_collection, context, model, options):
+def _material_reassign_indexes(context, rh_model):
+    """
+    Index the Rhino objects by GUID and the Blender materials by name
+    and rhid. Materials are indexed under their full name and without
+    the .001 style version suffix, as Rhino material names may end in
+    such a suffix themselves. The first material in name order is kept
+    for every key.
+    """
+    objects_by_id = {str(rh_obj.Attributes.Id): rh_obj for rh_obj in rh_model.Objects}
+    materials_by_name = dict()
+    for mat in context.blend_data.materials:
+        rhid = mat.get('rhid', None)
+        materials_by_name.setdefault((mat.name, rhid), mat)
+        materials_by_name.setdefault((re.sub(r"\.\d{3,}$", "", mat.name), rhid), mat)
+    return (objects_by_id, materials_by_name)
+
+
+def _reassign_materials_to_block_objects(parent_collection, context, model, options, indexes=None):
     """
     Reassign materials to existing block objects when creating new material versions.
     This ensures that existing blocks use the new materials instead of old ones.
+    indexes are the lookups from _material_reassign_indexes, shared between
+    block definitions.
     """
     from . import material as mat_module
     
     # Get materials dictionary that was created during material import
     # We need to access the global materials dict that was created
     rh_model = options.get("rh_model", model)
+    if indexes is None:
+        indexes = _material_reassign_indexes(context, rh_model)
+    objects_by_id, materials_by_name = indexes
     
     for obj in parent_collection.objects:
         if not obj.get('rhid'):
             continue
             
         # Find the original Rhino object by GUID to get its material info
-        rhino_obj = None
-        for rh_obj in rh_model.Objects:
-            if str(rh_obj.Attributes.Id) == obj.get('rhid'):
-                rhino_obj = rh_obj
-                break
+        rhino_obj = objects_by_id.get(obj.get('rhid'), None)
                 
         if not rhino_obj:
             continue
@@ -169,18 +189,29 @@ def _reassign_materials_to_block_objects(parent_collection, context, model, opti
             matname = mat_module.material_name(rhino_material)
             
         # Find the new material by name (should have .001, .002 suffix)
-        new_material = None
-        for mat in context.blend_data.materials:
-            if mat.name.startswith(matname) and mat.get('rhid') == str(rhino_material.Id if rhino_material else mat_module.DEFAULT_RHINO_MATERIAL_ID):
-                new_material = mat
-                break
+        new_material = materials_by_name.get((matname, str(rhino_material.Id if rhino_material else mat_module.DEFAULT_RHINO_MATERIAL_ID)), None)
                 
         if new_material and len(obj.material_slots) > 0:
             obj.material_slots[0].material = new_material
             print(f"  Updated object '{obj.name}' to use material '{new_material.name}'")
 
 
+def _objects_by_rhid(context):
+    """
+    Index all objects of the .blend by their rhid in one pass. Several
+    objects can share an rhid, for instance the instance empties of
+    nested block references or objects of earlier imports.
+    """
+    index = dict()
+    for ob in context.blend_data.objects:
+        rhid = ob.get('rhid', None)
+        if rhid is not None:
+            index.setdefault(rhid, []).append(ob)
+    return index
+
+
 def populate_instance_definitions(context, model, toplayer, layername, options, scale):
+    t0 = time.perf_counter()
     import_as_grid = options.get("import_instances_grid_layout",False)
     create_fresh_blocks = options.get("create_fresh_block_definitions", False)
 
@@ -210,6 +241,11 @@ def populate_instance_definitions(context, model, toplayer, layername, options,
     else:
         instance_col = context.blend_data.collections[layername]
 
+    objects_by_rhid = _objects_by_rhid(context)
+    # built when the first preserved block needs its materials reassigned
+    reassign_indexes = None
+    populated = 0
+
     #for every instance definition fish out the instance definition objects and link them to their parent
     for idef in model.InstanceDefinitions:
         # Use the same GUID modification logic as in handle_instance_definitions
@@ -240,7 +276,9 @@ def populate_instance_definitions(context, model, toplayer, layername, options,
             if create_new_materials:
                 # User wants new material versions - reassign materials to existing objects
                 print(f"Updating materials for existing block definition '{idef.Name}' with {len(parent.objects)} objects")
-                _reassign_materials_to_block_objects(parent, context, model, options)
+                if reassign_indexes is None:
+                    reassign_indexes = _material_reassign_indexes(context, options.get("rh_model", model))
+                _reassign_materials_to_block_objects(parent, context, model, options, reassign_indexes)
             else:
                 # Preserve user's materials/UV work completely
                 print(f"Preserving existing block definition '{idef.Name}' with {len(parent.objects)} objects")
@@ -261,22 +299,24 @@ def populate_instance_definitions(context, model, toplayer, layername, options,
 
         # Link objects to block definition collection
         linked_count = 0
-        for ob in context.blend_data.objects:
-            for guid in objectids:
-                if ob.get('rhid',None) == str(guid):
-                    # For fresh blocks, only link objects that aren't already linked to other collections
-                    # This prevents old objects from being included in fresh block definitions
-                    if create_fresh_blocks and len(ob.users_collection) > 0:
-                        # Skip objects that are already part of other collections (old objects)
-                        continue
-                    try:
-                        parent.objects.link(ob)
-                        linked_count += 1
-                        if import_as_grid:
-                            ob.location += offset #apply the previously calculated offset to all instance definition objects
-                    except Exception:
-                        pass
+        for guid in objectids:
+            for ob in objects_by_rhid.get(str(guid), ()):
+                # For fresh blocks, only link objects that aren't already linked to other collections
+                # This prevents old objects from being included in fresh block definitions
+                if create_fresh_blocks and len(ob.users_collection) > 0:
+                    # Skip objects that are already part of other collections (old objects)
+                    continue
+                try:
+                    parent.objects.link(ob)
+                    linked_count += 1
+                    if import_as_grid:
+                        ob.location += offset #apply the previously calculated offset to all instance definition objects
+                except Exception:
+                    pass
+        populated += 1
         
         # Debug: Print info about block definition population
         if len(objectids) > 0:
             print(f"Block '{idef.Name}': Expected {len(objectids)} objects, linked {linked_count} objects")
+
+    options["block_population"] = (populated, time.perf_counter() - t0)
@@ -0,0 +1,130 @@
+# MIT License
+
+# Copyright (c) 2018-2024 Nathan Letwory, Joel Putnam, Tom Svilans, Lukas Fertig
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# *** curves as edge meshes
+
+import rhino3dm as r3d
+import numpy as np
+from itertools import chain
+
+from . import nurbs
+from .curve import polyline_points
+
+# refinement passes when sampling curves to a chord tolerance, every
+# pass at most doubles the sample count of a span
+_MAX_REFINE = 12
+
+
+def sample_nurbs(nc, tolerance : float) -> np.ndarray:
+    """
+    Sample a NurbsCurve so no chord is further than tolerance from the
+    curve, measured at the middle of each chord. Sampling starts at the
+    knots, subdivided by the degree, and spans are split where needed.
+    """
+    t0 = nc.Domain.T0
+    t1 = nc.Domain.T1
+    data = nurbs.from_rhino(nc)
+    knots = data.knots
+    knots = np.union1d(knots[(knots >= t0) & (knots <= t1)], (t0, t1))
+    steps = 2 * nc.Degree if nc.Degree > 1 else 1
+    params = np.concatenate([np.linspace(a, b, steps, endpoint=False) for a, b in zip(knots[:-1], knots[1:])] + [[t1]])
+    points = nurbs.evaluate(data, params)
+
+    if nc.Degree == 1:
+        return points
+
+    for _ in range(_MAX_REFINE):
+        mid_params = (params[:-1] + params[1:]) * 0.5
+        mids = nurbs.evaluate(data, mid_params)
+        deviation = np.linalg.norm(mids - (points[:-1] + points[1:]) * 0.5, axis=1)
+        split = np.flatnonzero(deviation > tolerance)
+        if not len(split):
+            break
+        params = np.insert(params, split + 1, mid_params[split])
+        points = np.insert(points, split + 1, mids[split], axis=0)
+    return points
+
+
+def curve_polylines(rcurve, tolerance : float):
+    """
+    Return the polylines, as (N, 3) arrays, approximating a Rhino curve.
+    Lines and polylines are taken as they are, polycurves per segment,
+    everything else is sampled to tolerance.
+    """
+    if isinstance(rcurve, r3d.LineCurve):
+        return [np.array([(rcurve.Line.From.X, rcurve.Line.From.Y, rcurve.Line.From.Z),
+                          (rcurve.Line.To.X, rcurve.Line.To.Y, rcurve.Line.To.Z)], dtype=np.float64)]
+    if isinstance(rcurve, r3d.PolylineCurve):
+        return [polyline_points(rcurve, rcurve.PointCount)]
+    if isinstance(rcurve, r3d.PolyCurve):
+        return list(chain.from_iterable(curve_polylines(rcurve.SegmentCurve(seg), tolerance) for seg in range(rcurve.SegmentCount)))
+    nc = rcurve if isinstance(rcurve, r3d.NurbsCurve) else rcurve.ToNurbsCurve()
+    if nc is None:
+        print("Failed to convert type", type(rcurve))
+        return []
+    return [sample_nurbs(nc, tolerance)]
+
+
+def import_edge_mesh(context, obs, name, scale, options):
+    """
+    Import the curves of obs as edges of one mesh. Which edges came from
+    which Rhino curve is kept in the rhcurve_ids and rhcurve_edges custom
+    properties.
+    """
+    tolerance = options.get("curve_tolerance", 0.0001) / scale
+
+    ids = list()
+    edge_starts = list()
+    polylines = list()
+    edge_count = 0
+    for ob in obs:
+        ids.append(str(ob.Attributes.Id))
+        edge_starts.append(edge_count)
+        for pts in curve_polylines(ob.Geometry, tolerance):
+            if len(pts) < 2:
+                continue
+            polylines.append(pts)
+            edge_count += len(pts) - 1
+    edge_starts.append(edge_count)
+
+    counts = np.array([len(pts) for pts in polylines], dtype=np.int64)
+    vertices = np.concatenate(polylines) * scale if polylines else np.empty((0, 3))
+    # every vertex starts an edge to the next, except the last of each
+    # polyline
+    first = np.arange(len(vertices))
+    last = np.cumsum(counts) - 1
+    first = np.delete(first, last)
+    edges = np.stack((first, first + 1), axis=1).astype(np.int32)
+
+    mesh = context.blend_data.meshes.new(name=name)
+    mesh.vertices.add(len(vertices))
+    mesh.edges.add(len(edges))
+    mesh.vertices.foreach_set("co", np.ascontiguousarray(vertices, dtype=np.float32).ravel())
+    mesh.edges.foreach_set("vertices", edges.ravel())
+    mesh.update()
+
+    # ID properties can't hold lists of strings
+    mesh["rhcurve_ids"] = ",".join(ids)
+    mesh["rhcurve_edges"] = edge_starts
+
+    return mesh
@@ -0,0 +1,159 @@
+# MIT License
+
+# Copyright (c) 2018-2024 Nathan Letwory, Joel Putnam, Tom Svilans, Lukas Fertig
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# *** vectorized NURBS curve evaluation
+
+import numpy as np
+
+
+class NurbsData:
+    """
+    Degree, full knot vector and homogeneous control points of a NURBS
+    curve, ready for evaluate.
+    """
+    __slots__ = ("degree", "knots", "points")
+
+    def __init__(self, degree : int, knots : np.ndarray, points : np.ndarray):
+        self.degree = degree
+        self.knots = knots
+        self.points = points
+
+
+def from_rhino(nc) -> NurbsData:
+    """
+    Gather the data of an r3d.NurbsCurve. Rhino leaves out the first and
+    last knot of the textbook knot vector, they are added back here.
+    Control points are read as homogeneous (x*w, y*w, z*w, w) points,
+    which is what rhino3dm returns for rational curves, non rational
+    curves have w = 1.
+    """
+    knots = np.fromiter((nc.Knots[i] for i in range(len(nc.Knots))), dtype=np.float64, count=len(nc.Knots))
+    knots = np.concatenate(([knots[0]], knots, [knots[-1]]))
+    count = len(nc.Points)
+    points = np.empty((count, 4), dtype=np.float64)
+    for i in range(count):
+        p = nc.Points[i]
+        points[i] = (p.X, p.Y, p.Z, p.W)
+    if not nc.IsRational:
+        points[:, 3] = 1.0
+    return NurbsData(nc.Degree, knots, points)
+
+
+def find_spans(knots : np.ndarray, degree : int, count : int, params : np.ndarray) -> np.ndarray:
+    """
+    Knot span index of every parameter, the i with knots[i] <= t <
+    knots[i + 1], limited to the spans of the curve domain so the end
+    parameter falls in the last span.
+    """
+    spans = np.searchsorted(knots, params, side='right') - 1
+    return np.clip(spans, degree, count - 1)
+
+
+def _de_boor(knots : np.ndarray, p : int, points : np.ndarray, params : np.ndarray) -> np.ndarray:
+    # De Boor's algorithm on all parameters side by side, points may
+    # have any number of coordinates
+    spans = find_spans(knots, p, len(points), params)
+
+    # the p + 1 control points influencing each parameter
+    d = points[spans[:, None] - p + np.arange(p + 1)]
+    t = params[:, None]
+    for r in range(1, p + 1):
+        j = np.arange(r, p + 1)
+        i = spans[:, None] - p + j
+        left = knots[i]
+        denom = knots[i + p + 1 - r] - left
+        with np.errstate(divide='ignore', invalid='ignore'):
+            alpha = np.where(denom != 0.0, (t - left) / denom, 0.0)
+        d[:, r:] = (1.0 - alpha)[:, :, None] * d[:, r - 1:p] + alpha[:, :, None] * d[:, r:]
+    return d[:, p]
+
+
+def evaluate(data : NurbsData, params) -> np.ndarray:
+    """
+    Evaluate a curve at all params at once with De Boor's algorithm,
+    run on all parameters side by side. Returns a (len(params), 3)
+    array of points.
+    """
+    cw = _de_boor(data.knots, data.degree, data.points, np.asarray(params, dtype=np.float64))
+    return cw[:, :3] / cw[:, 3:]
+
+
+def basis_matrix(knots : np.ndarray, degree : int, count : int, params) -> np.ndarray:
+    """
+    Values of all count B-spline basis functions at params as a
+    (len(params), count) matrix.
+    """
+    return _de_boor(knots, degree, np.identity(count), np.asarray(params, dtype=np.float64))
+
+
+# *** surfaces
+
+class NurbsSurfaceData:
+    """
+    Degrees, full knot vectors and homogeneous control points, a
+    (count u, count v, 4) array, of a NURBS surface.
+    """
+    __slots__ = ("degree_u", "degree_v", "knots_u", "knots_v", "points")
+
+    def __init__(self, degree_u : int, degree_v : int, knots_u : np.ndarray, knots_v : np.ndarray, points : np.ndarray):
+        self.degree_u = degree_u
+        self.degree_v = degree_v
+        self.knots_u = knots_u
+        self.knots_v = knots_v
+        self.points = points
+
+
+def _full_knots(knots) -> np.ndarray:
+    k = np.fromiter((knots[i] for i in range(len(knots))), dtype=np.float64, count=len(knots))
+    return np.concatenate(([k[0]], k, [k[-1]]))
+
+
+def from_rhino_surface(ns) -> NurbsSurfaceData:
+    """
+    Gather the data of an r3d.NurbsSurface, like from_rhino does for
+    curves.
+    """
+    count_u = ns.Points.CountU
+    count_v = ns.Points.CountV
+    get = getattr(ns.Points, "GetControlPoint", None)
+    if get is None:
+        get = lambda i, j: ns.Points[i, j]
+    points = np.empty((count_u, count_v, 4), dtype=np.float64)
+    for i in range(count_u):
+        for j in range(count_v):
+            p = get(i, j)
+            points[i, j] = (p.X, p.Y, p.Z, p.W)
+    if not ns.IsRational:
+        points[:, :, 3] = 1.0
+    return NurbsSurfaceData(ns.OrderU - 1, ns.OrderV - 1, _full_knots(ns.KnotsU), _full_knots(ns.KnotsV), points)
+
+
+def evaluate_surface_grid(data : NurbsSurfaceData, u, v) -> np.ndarray:
+    """
+    Evaluate a surface on the grid of all combinations of u and v.
+    Returns a (len(u), len(v), 3) array of points.
+    """
+    nu = basis_matrix(data.knots_u, data.degree_u, data.points.shape[0], u)
+    nv = basis_matrix(data.knots_v, data.degree_v, data.points.shape[1], v)
+    sw = np.einsum('ai,ijk,bj->abk', nu, data.points, nv, optimize=True)
+    return sw[:, :, :3] / sw[:, :, 3:]
@@ -0,0 +1,127 @@
+# MIT License
+
+# Copyright (c) 2018-2024 Nathan Letwory, Joel Putnam, Tom Svilans, Lukas Fertig
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# *** cheap stand-ins for render meshes
+
+import bpy
+import bmesh
+import numpy as np
+
+from . import weld
+
+# corners of the unit cube and its six quads, wound outwards
+_BOX_CORNERS = np.array([(x, y, z) for z in (0, 1) for y in (0, 1) for x in (0, 1)], dtype=np.float64)
+_BOX_FACES = np.array([
+    (0, 2, 3, 1), (4, 5, 7, 6),
+    (0, 1, 5, 4), (2, 6, 7, 3),
+    (0, 4, 6, 2), (1, 3, 7, 5),
+], dtype=np.int32)
+
+
+def _set_geometry(buffers, vertices, loop_vertices, loop_totals):
+    # stand-ins carry no texture coordinates, colors or normals
+    buffers.vertices = vertices
+    buffers.loop_vertices = loop_vertices
+    buffers.loop_totals = loop_totals
+    buffers.coords = []
+    buffers.colors = None
+    buffers.normals = None
+    return buffers
+
+
+def bounding_box(buffers):
+    """
+    Replace MeshBuffers with their axis aligned bounding box.
+    """
+    lo = buffers.vertices.min(axis=0)
+    hi = buffers.vertices.max(axis=0)
+    vertices = lo + _BOX_CORNERS * (hi - lo)
+    return _set_geometry(buffers, vertices, _BOX_FACES.ravel().copy(), np.full(len(_BOX_FACES), 4, dtype=np.int32))
+
+
+def convex_hull(buffers):
+    """
+    Replace MeshBuffers with the convex hull of their vertices.
+    """
+    # go through a temporary mesh so the vertices are copied in bulk
+    tmp = bpy.data.meshes.new("rhino_hull")
+    tmp.vertices.add(len(buffers.vertices))
+    tmp.vertices.foreach_set("co", np.ascontiguousarray(buffers.vertices, dtype=np.float32).ravel())
+    bm = bmesh.new()
+    bm.from_mesh(tmp)
+    bpy.data.meshes.remove(tmp)
+
+    result = bmesh.ops.convex_hull(bm, input=bm.verts)
+    unused = [v for v in result["geom_interior"] + result["geom_unused"] if isinstance(v, bmesh.types.BMVert)]
+    bmesh.ops.delete(bm, geom=unused, context='VERTS')
+    bm.verts.index_update()
+
+    vertices = np.array([v.co for v in bm.verts], dtype=np.float64).reshape(-1, 3)
+    loop_vertices = np.array([v.index for f in bm.faces for v in f.verts], dtype=np.int32)
+    loop_totals = np.array([len(f.verts) for f in bm.faces], dtype=np.int32)
+    bm.free()
+
+    if not len(loop_totals):
+        # flat or degenerate input, fall back to the box
+        return bounding_box(buffers)
+    return _set_geometry(buffers, vertices, loop_vertices, loop_totals)
+
+
+def cluster(buffers, resolution : int):
+    """
+    Decimate MeshBuffers by vertex clustering. The bounding box is cut
+    into cells, resolution along its longest side, and all vertices of
+    a cell are merged into their average.
+    """
+    vertices = buffers.vertices
+    lo = vertices.min(axis=0)
+    size = float((vertices.max(axis=0) - lo).max()) / max(resolution, 1)
+    if size <= 0.0:
+        return bounding_box(buffers)
+
+    cells = np.floor((vertices - lo) / size).astype(np.int64)
+    _, first, inverse = np.unique(cells, axis=0, return_index=True, return_inverse=True)
+    inverse = inverse.ravel()
+    counts = np.bincount(inverse)
+    centers = np.stack([np.bincount(inverse, weights=vertices[:, axis]) for axis in range(3)], axis=1) / counts[:, None]
+
+    buffers.vertices = vertices.copy()
+    buffers.vertices[first] = centers
+    buffers.normals = None
+    return weld.collapse_vertices(buffers, first[inverse])
+
+
+def make_proxy(buffers, mode : str, resolution : int = 16):
+    """
+    Turn MeshBuffers into a stand-in according to mode, one of
+    BOUNDING_BOX, CONVEX_HULL or CLUSTER.
+    """
+    if len(buffers.vertices) == 0:
+        return buffers
+    if mode == "BOUNDING_BOX":
+        return bounding_box(buffers)
+    if mode == "CONVEX_HULL":
+        return convex_hull(buffers)
+    if mode == "CLUSTER":
+        return cluster(buffers, resolution)
+    return buffers
@@ -22,100 +22,491 @@
 
 import rhino3dm as r3d
 from . import utils
+from . import weld
+from . import duplicates
+from . import proxy
+from . import tessellate
 import bpy
 import bmesh
+import hashlib
+import numpy as np
 
-def import_render_mesh(context, ob, name, scale, options):
-    # concatenate all meshes from all (brep) faces,
-    # adjust vertex indices for faces accordingly
-    # first get all render meshes
-    og = ob.Geometry
-    oa = ob.Attributes
 
-    needs_welding = True
+class MeshBuffers:
+    """
+    Flat buffers describing one Blender mesh. coords holds one array of
+    texture coordinates per face corner for every texture coordinate
+    channel, normals the normals per face corner and colors the colors
+    per vertex. coords is empty, normals and colors are None when not
+    every source mesh carries them.
+    """
+    __slots__ = ("vertices", "loop_vertices", "loop_totals", "coords", "colors", "normals")
+
+    def __init__(self, vertices, loop_vertices, loop_totals, coords=(), colors=None, normals=None):
+        self.vertices = vertices
+        self.loop_vertices = loop_vertices
+        self.loop_totals = loop_totals
+        self.coords = list(coords)
+        self.colors = colors
+        self.normals = normals
+
+    def arrays(self):
+        yield self.vertices
+        yield self.loop_vertices
+        yield self.loop_totals
+        yield from self.coords
+        if self.colors is not None:
+            yield self.colors
+        if self.normals is not None:
+            yield self.normals
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self.arrays())
+
+
+# *** mesh data cache
+#
+# Identical geometry found during one import shares a single mesh
+# datablock. Meshes are keyed by a hash of their buffers right after
+# concatenation together with the settings that change the result.
+
+_mesh_cache = dict()
+_mesh_cache_stats = dict()
+
+def clear_mesh_cache() -> None:
+    global _mesh_cache, _mesh_cache_stats
+    _mesh_cache = dict()
+    _mesh_cache_stats = {"hits": 0, "misses": 0, "bytes_saved": 0}
+
+clear_mesh_cache()
+
+def mesh_cache_stats():
+    return dict(_mesh_cache_stats)
+
+def _buffers_key(buffers : MeshBuffers, settings) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for a in buffers.arrays():
+        h.update(str(a.shape).encode())
+        h.update(np.ascontiguousarray(a).data)
+    h.update(repr(settings).encode())
+    return h.digest()
+
+
+def _texture_coordinate_channels(m):
+    # rhino3dm only exposes the texture coordinates of the default
+    # mapping, cached coordinates of other mappings are not available
+    return [m.TextureCoordinates]
+
+
+def concatenate_face_meshes(msh, scale, read_normals=False) -> MeshBuffers:
+    """
+    Concatenate the render meshes of all (brep) faces into one set of
+    buffers. Vertex and face offsets are computed up front so every
+    face mesh is copied once into its slice of the combined arrays.
+    Vertex normals are only read when read_normals is set.
+    """
+    msh = [m for m in msh if m]
+    vertex_counts = np.array([len(m.Vertices) for m in msh], dtype=np.int64)
+    face_counts = np.array([len(m.Faces) for m in msh], dtype=np.int64)
+    vertex_offsets = np.concatenate(([0], np.cumsum(vertex_counts)))
+    face_offsets = np.concatenate(([0], np.cumsum(face_counts)))
+
+    channels = [_texture_coordinate_channels(m) for m in msh]
+    channel_count = min((len(c) for c in channels), default=0)
+    for channel in range(channel_count):
+        if not all(len(c[channel]) == len(m.Vertices) for c, m in zip(channels, msh)):
+            channel_count = channel
+            break
+    has_colors = all(len(m.VertexColors) == len(m.Vertices) for m in msh)
+    has_normals = read_normals and all(len(m.Normals) == len(m.Vertices) for m in msh)
+
+    vertices = np.empty((vertex_offsets[-1], 3), dtype=np.float64)
+    faces = np.empty((face_offsets[-1], 4), dtype=np.int32)
+    coords = [np.empty((vertex_offsets[-1], 2), dtype=np.float32) for _ in range(channel_count)]
+    colors = np.empty((vertex_offsets[-1], 4), dtype=np.uint8) if has_colors else None
+    normals = np.empty((vertex_offsets[-1], 3), dtype=np.float32) if has_normals else None
+
+    for i, m in enumerate(msh):
+        vs = slice(vertex_offsets[i], vertex_offsets[i + 1])
+        fs = slice(face_offsets[i], face_offsets[i + 1])
+        nv = vertex_counts[i]
+        vertices[vs] = utils.points_to_array(m.Vertices, nv)
+        faces[fs] = utils.tuples_to_array(m.Faces, face_counts[i], 4)
+        faces[fs] += vertex_offsets[i]
+        for channel in range(channel_count):
+            coords[channel][vs] = utils.points_to_array(channels[i][channel], nv, 2)
+        if has_colors:
+            colors[vs] = utils.tuples_to_array(m.VertexColors, nv, 4, np.uint8)
+        if has_normals:
+            normals[vs] = utils.points_to_array(m.Normals, nv)
+    vertices *= scale
+
+    # Rhino always uses 4 values to describe faces, which can lead to
+    # invalid faces in Blender. Tris will have a duplicate index for the 4th
+    # value, so mask that corner out for all faces at once.
+    is_quad = faces[:, 2] != faces[:, 3]
+    corners = np.ones(faces.shape, dtype=bool)
+    corners[:, 3] = is_quad
+    loop_vertices = faces[corners]
+    loop_totals = np.where(is_quad, 4, 3).astype(np.int32)
+    coords = [c[loop_vertices] for c in coords]
+    if has_normals:
+        normals = normals[loop_vertices]
+
+    return MeshBuffers(vertices, loop_vertices, loop_totals, coords, colors, normals)
+
 
+def append_tessellated_faces(buffers : MeshBuffers, tessellated, scale) -> MeshBuffers:
+    """
+    Append faces tessellated by tessellate_missing_faces to buffers. The
+    surface parameters of tessellated faces continue the first texture
+    coordinate channel, vertex colors and normals are dropped.
+    """
+    vertex_offsets = np.cumsum([len(buffers.vertices)] + [len(v) for v, _, _ in tessellated])
+    triangles = [t + offset for (_, t, _), offset in zip(tessellated, vertex_offsets)]
+    uvs = [uv[t].astype(np.float32) for (_, t, uv) in tessellated]
+
+    if buffers.coords or not len(buffers.vertices):
+        first = buffers.coords[0] if buffers.coords else np.empty((0, 2), dtype=np.float32)
+        buffers.coords = [np.concatenate([first] + [uv.reshape(-1, 2) for uv in uvs])]
+    buffers.vertices = np.concatenate([buffers.vertices] + [v * scale for v, _, _ in tessellated])
+    buffers.loop_vertices = np.concatenate([buffers.loop_vertices] + [t.ravel() for t in triangles]).astype(np.int32)
+    buffers.loop_totals = np.concatenate([buffers.loop_totals] + [np.full(len(t), 3, dtype=np.int32) for t in triangles])
+    buffers.colors = None
+    buffers.normals = None
+    return buffers
+
+
+def fill_mesh(mesh, vertices, loop_vertices, loop_totals):
+    """
+    Fill an empty Blender mesh from flat buffers: vertices as an (N, 3)
+    float array, loop_vertices with the vertex index of every face corner
+    and loop_totals with the corner count of every face.
+    """
+    loop_starts = np.cumsum(loop_totals, dtype=np.int32) - loop_totals
+
+    mesh.vertices.add(len(vertices))
+    mesh.loops.add(len(loop_vertices))
+    mesh.polygons.add(len(loop_totals))
+
+    mesh.vertices.foreach_set("co", np.ascontiguousarray(vertices, dtype=np.float32).ravel())
+    mesh.loops.foreach_set("vertex_index", np.ascontiguousarray(loop_vertices, dtype=np.int32))
+    mesh.polygons.foreach_set("loop_start", loop_starts)
+
+    mesh.update(calc_edges=True)
+
+
+def render_meshes(og, missing=None):
+    """
+    Return the render meshes of a geometry, one per face for breps.
+    Entries may be None when a face has no render mesh, the indices of
+    those faces are appended to missing when given.
+    """
     if og.ObjectType == r3d.ObjectType.Extrusion:
-        msh = [og.GetMesh(r3d.MeshType.Any)]
+        return [og.GetMesh(r3d.MeshType.Any)]
     elif og.ObjectType == r3d.ObjectType.Mesh:
-        msh = [og]
+        return [og]
     elif og.ObjectType == r3d.ObjectType.SubD:
-        msh = [r3d.Mesh.CreateFromSubDControlNet(og, True)]
+        return [r3d.Mesh.CreateFromSubDControlNet(og, True)]
     elif og.ObjectType == r3d.ObjectType.Brep:
-        msh = [og.Faces[f].GetMesh(r3d.MeshType.Any) for f in range(len(og.Faces)) if type(og.Faces[f])!=list]
-    fidx = 0
-    faces = []
-    vertices = []
-    coords = []
-    vcls = []
-
-    # now add all faces and vertices to the main lists
-    for m in msh:
-        if not m:
+        msh = list()
+        for f in range(len(og.Faces)):
+            face = og.Faces[f]
+            if type(face) == list:
+                continue
+            m = face.GetMesh(r3d.MeshType.Any)
+            if m is None and missing is not None:
+                missing.append(f)
+            msh.append(m)
+        return msh
+    return []
+
+
+def find_transformed_duplicates(objects, scale, options):
+    """
+    Analysis pass over the mesh like objects among objects, those that
+    are imported. Objects with matching pose normalized geometry are
+    translated and/or rotated copies of each other. Meshes that are
+    streamed are left out. Returns a dictionary
+    mapping the object ids of all copies to (group key, matrix).
+    """
+    merge_dist = options.get("merge_distance", 0.000001)
+    finder = duplicates.DuplicateFinder()
+    for ob in objects:
+        og = ob.Geometry
+        if og.ObjectType not in (r3d.ObjectType.Mesh, r3d.ObjectType.Brep, r3d.ObjectType.Extrusion):
+            continue
+        if is_streamed(og, options):
+            continue
+        buffers = concatenate_face_meshes(render_meshes(og), scale)
+        if len(buffers.vertices) == 0:
             continue
-        faces.extend([list(map(lambda x: x + fidx, m.Faces[f])) for f in range(len(m.Faces))])
+        # copies far from the origin carry more float noise than the
+        # size of the part alone would suggest
+        centroid = buffers.vertices.mean(axis=0)
+        radius = float(np.linalg.norm(buffers.vertices - centroid, axis=1).max())
+        tolerance = max(merge_dist, 1e-4 * radius, 1e-6 * (float(np.abs(centroid).max()) + radius))
+        finder.add(str(ob.Attributes.Id), buffers, tolerance, salt=og.ObjectType == r3d.ObjectType.Brep)
+    return finder.duplicates()
 
-        # Rhino always uses 4 values to describe faces, which can lead to
-        # invalid faces in Blender. Tris will have a duplicate index for the 4th
-        # value.
-        for f in faces:
-            if f[-1] == f[-2]:
-                del f[-1]
 
-        fidx = fidx + len(m.Vertices)
-        vertices.extend([(m.Vertices[v].X * scale, m.Vertices[v].Y * scale, m.Vertices[v].Z * scale) for v in range(len(m.Vertices))])
-        coords.extend([(m.TextureCoordinates[v].X, m.TextureCoordinates[v].Y) for v in range(len(m.TextureCoordinates))])
-        vcls.extend((m.VertexColors[v][0], m.VertexColors[v][1], m.VertexColors[v][2], m.VertexColors[v][3]) for v in range(len(m.VertexColors)))
+# *** streaming of very large meshes
+#
+# The buffers of a single large mesh are gathered chunk by chunk straight
+# into float32 arrays of the final Blender layout, so neither float64
+# copies nor per corner expansions of the whole mesh exist at any time.
+
+def estimate_buffer_bytes(m) -> int:
+    """
+    Rough size in bytes of the MeshBuffers a mesh would be gathered into,
+    including the per corner arrays created from them.
+    """
+    return len(m.Vertices) * 48 + len(m.Faces) * 112
+
+
+def is_streamed(og, options) -> bool:
+    """
+    Whether og is a single mesh above the streaming threshold, which
+    is imported by stream_large_mesh.
+    """
+    memory_limit = options.get("memory_limit", 0) * 1024 * 1024
+    if not memory_limit or og.ObjectType != r3d.ObjectType.Mesh or options.get("mesh_detail", "FULL") != "FULL":
+        return False
+    return estimate_buffer_bytes(og) > memory_limit
+
+
+def stream_large_mesh(context, ob, name, scale, options):
+    """
+    Build a Blender mesh from a large rhino3dm Mesh reading it in chunks.
+    Only the reads are chunked, the float32 vertex, corner and UV arrays
+    handed to Blender are allocated at full size. Vertices are not
+    welded, that would need the whole mesh in memory at once.
+    """
+    og = ob.Geometry
+    oa = ob.Attributes
+    memory_limit = options.get("memory_limit", 0) * 1024 * 1024
+    chunk = max(1 << 16, memory_limit // 256)
+    color_type = options.get("vertex_color_type", "FLOAT_COLOR")
+
+    nv = len(og.Vertices)
+    nf = len(og.Faces)
+    chunk_count = 0
+
+    # first pass over the faces only to learn the corner count
+    is_quad = np.empty(nf, dtype=bool)
+    for start, count in utils.chunks(nf, chunk):
+        faces = utils.tuples_to_array(og.Faces, count, 4, start=start)
+        is_quad[start:start + count] = faces[:, 2] != faces[:, 3]
+        chunk_count += 1
+    loop_totals = np.where(is_quad, 4, 3).astype(np.int32)
+    del is_quad
+
+    loop_vertices = np.empty(int(loop_totals.sum()), dtype=np.int32)
+    loop_starts = np.cumsum(loop_totals, dtype=np.int64) - loop_totals
+    for start, count in utils.chunks(nf, chunk):
+        faces = utils.tuples_to_array(og.Faces, count, 4, start=start)
+        corners = np.ones((count, 4), dtype=bool)
+        corners[:, 3] = loop_totals[start:start + count] == 4
+        first = loop_starts[start]
+        block = faces[corners]
+        loop_vertices[first:first + len(block)] = block
+        chunk_count += 1
+    del loop_starts
 
     tags = utils.create_tag_dict(oa.Id, oa.Name)
     mesh = utils.get_or_create_iddata(context.blend_data.meshes, tags, None)
     mesh.clear_geometry()
-    mesh.from_pydata(vertices, [], faces, shade_flat=False)
 
+    vertices = np.empty((nv, 3), dtype=np.float32)
+    for start, count in utils.chunks(nv, chunk):
+        vertices[start:start + count] = utils.points_to_array(og.Vertices, count, start=start) * scale
+        chunk_count += 1
+    fill_mesh(mesh, vertices, loop_vertices, loop_totals)
+    del vertices, loop_totals
 
-    if mesh.loops and len(coords) == len(vertices):
-        # todo:
-        # * check for multiple mappings and handle them
-        # * get mapping name (missing from rhino3dm)
-        # * rhino assigns a default mapping to unmapped objects, so if nothing is specified, this will be imported
+    if mesh.loops and len(og.TextureCoordinates) == nv:
+        coords = np.empty((nv, 2), dtype=np.float32)
+        for start, count in utils.chunks(nv, chunk):
+            coords[start:start + count] = utils.points_to_array(og.TextureCoordinates, count, 2, start=start)
+            chunk_count += 1
+        uv_layer = mesh.uv_layers.new(name="RhinoUVMap")
+        uv_layer.data.foreach_set("uv", coords[loop_vertices].ravel())
+        del coords
+    del loop_vertices
+
+    if len(og.VertexColors) == nv:
+        colors = np.empty((nv, 4), dtype=np.float32)
+        for start, count in utils.chunks(nv, chunk):
+            colors[start:start + count] = utils.tuples_to_array(og.VertexColors, count, 4, np.uint8, start=start)
+            chunk_count += 1
+        colors /= np.float32(255.0)
+        rcl = mesh.attributes.new("RhinoColor", color_type, "POINT")
+        rcl.data.foreach_set("color_srgb", colors.ravel())
+        del colors
+
+    use_normals = options.get("import_normals", False) and len(og.Normals) == nv
+    if use_normals:
+        normals = np.empty((nv, 3), dtype=np.float32)
+        for start, count in utils.chunks(nv, chunk):
+            normals[start:start + count] = utils.points_to_array(og.Normals, count, start=start)
+            chunk_count += 1
+        if bpy.app.version < (4, 1):
+            mesh.use_auto_smooth = True
+        mesh.normals_split_custom_set_from_vertices(normals)
+        del normals
+    elif options.get("merge_vertices", True):
+        if bpy.app.version >= (4, 1):
+            mesh.set_sharp_from_angle(angle=0.523599) # 30deg
+        else:
+            mesh.use_auto_smooth = True
 
-        #create a new uv_layer and copy texcoords from input mesh
-        mesh.uv_layers.new(name="RhinoUVMap")
+    print(f"Mesh '{name}': streamed {nv} vertices and {nf} faces in {chunk_count} chunks, not welded, process peak RSS so far {utils.peak_rss() / (1024 * 1024):.0f} MB")
+    return mesh
 
-        if sum(len(x) for x in faces) == len(mesh.uv_layers["RhinoUVMap"].data):
-            uvl = mesh.uv_layers["RhinoUVMap"].data[:]
 
-            for l in mesh.loops:
-                uvl[l.index].uv = coords[l.vertex_index]
+def _cache_hit(cache_key):
+    mesh, nbytes = _mesh_cache[cache_key]
+    _mesh_cache_stats["hits"] += 1
+    _mesh_cache_stats["bytes_saved"] += nbytes
+    return mesh
 
-            mesh.validate()
-            mesh.update()
 
-        else:
-            #in case there was a data mismatch, cleanup the created layer
-            mesh.uv_layers.remove(mesh.uv_layers["RhinoUVMap"])
+def import_render_mesh(context, ob, name, scale, options):
+    og = ob.Geometry
+    oa = ob.Attributes
+
+    merge_vertices_enabled = options.get("merge_vertices", True)
+    merge_dist = options.get("merge_distance", 0.000001)  # Configurable merge distance
+    weld_engine = options.get("weld_engine", "BMESH")
+    color_type = options.get("vertex_color_type", "FLOAT_COLOR")
+    import_normals = options.get("import_normals", False)
+    # SubD control nets are light already and stay as they are
+    proxy_mode = options.get("mesh_detail", "FULL")
+    if og.ObjectType == r3d.ObjectType.SubD:
+        proxy_mode = "FULL"
+    proxy_resolution = options.get("proxy_resolution", 16)
+    settings = (og.ObjectType == r3d.ObjectType.Brep, import_normals, merge_vertices_enabled, merge_dist, weld_engine, color_type, proxy_mode, proxy_resolution)
+
+    # transformed duplicates share a mesh built in their pose normalized
+    # frame, convert_object places each object with its own matrix
+    pose = options.get("pose_instances", {}).get(str(oa.Id), None)
+
+    # single meshes above the streaming threshold are streamed instead
+    if pose is None and is_streamed(og, options):
+        return stream_large_mesh(context, ob, name, scale, options)
+    cache_key = None
+    if pose is not None:
+        cache_key = (pose[0], settings)
+        if cache_key in _mesh_cache:
+            return _cache_hit(cache_key)
+
+    # concatenate all meshes from all (brep) faces,
+    # adjust vertex indices for faces accordingly
+    missing = list()
+    buffers = concatenate_face_meshes(render_meshes(og, missing), scale, read_normals=import_normals)
+
+    # Breps saved without render meshes are tessellated here
+    if missing and options.get("tessellate_breps", True):
+        tessellated = tessellate.tessellate_missing_faces(og, missing, name, scale, options)
+        if tessellated:
+            buffers = append_tessellated_faces(buffers, tessellated, scale)
+
+    if pose is not None:
+        buffers.vertices = duplicates.to_pose_frame(buffers.vertices, pose[1])
+        if buffers.normals is not None:
+            buffers.normals = buffers.normals @ pose[1][:3, :3].astype(np.float32)
+    elif options.get("mesh_cache", True):
+        cache_key = _buffers_key(buffers, settings)
+        if cache_key in _mesh_cache:
+            return _cache_hit(cache_key)
+    if cache_key is not None:
+        _mesh_cache_stats["misses"] += 1
+        cache_nbytes = buffers.nbytes
+
+    is_proxy = proxy_mode != "FULL"
+    if is_proxy:
+        buffers = proxy.make_proxy(buffers, proxy_mode, proxy_resolution)
 
-    if len(vcls) == len(vertices):
-        mesh.attributes.new("RhinoColor", "FLOAT_COLOR", "POINT")
-        rcl = mesh.attributes["RhinoColor"]
-        for i in range(len(vcls)):
-            vcl = vcls[i]
-            rcl.data[i].color =  (vcl[0] / 255.0, vcl[1] / 255.0, vcl[2] / 255.0, vcl[3] / 255.0)
+    # With Rhino normals as custom normals, meshes that have no coincident
+    # vertices are already welded and shade as in Rhino without further
+    # work. Brep face meshes always need their seams welded.
+    use_normals = buffers.normals is not None
+    needs_welding = not is_proxy
+    if use_normals and og.ObjectType != r3d.ObjectType.Brep:
+        needs_welding = len(np.unique(buffers.vertices, axis=0)) < len(buffers.vertices)
+
+    if needs_welding and merge_vertices_enabled and weld_engine == "NUMPY":
+        # render meshes of brep faces are welded internally already, only
+        # their seams need merging
+        buffers = weld.weld_buffers(buffers, merge_dist, seams_only=og.ObjectType == r3d.ObjectType.Brep)
+
+    vertices = buffers.vertices
+    loop_vertices = buffers.loop_vertices
+    coords = buffers.coords
+    vcls = buffers.colors
+
+    tags = utils.create_tag_dict(oa.Id, oa.Name)
+    mesh = utils.get_or_create_iddata(context.blend_data.meshes, tags, None)
+    mesh.clear_geometry()
+    fill_mesh(mesh, vertices, loop_vertices, buffers.loop_totals)
+
+
+    if mesh.loops and coords:
+        # todo:
+        # * get mapping name (missing from rhino3dm)
+        # * rhino assigns a default mapping to unmapped objects, so if nothing is specified, this will be imported
+
+        # create a uv layer per texture coordinate channel and copy the
+        # per corner texcoords in one go
+        for channel, channel_coords in enumerate(coords):
+            uv_name = "RhinoUVMap" if channel == 0 else f"RhinoUVMap_{channel}"
+            uv_layer = mesh.uv_layers.new(name=uv_name)
+            uv_layer.data.foreach_set("uv", np.ascontiguousarray(channel_coords, dtype=np.float32).ravel())
 
         mesh.validate()
         mesh.update()
 
-    merge_vertices_enabled = options.get("merge_vertices", True)
-    if needs_welding and merge_vertices_enabled:
-        bm = bmesh.new()
-        bm.from_mesh(mesh)
-        merge_dist = options.get("merge_distance", 0.000001)  # Configurable merge distance
-        bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=merge_dist)
-        bm.to_mesh(mesh)
-        bm.free()
-        if bpy.app.version >= (4, 1):
-            mesh.set_sharp_from_angle(angle=0.523599) # 30deg
+    if vcls is not None:
+        # Rhino colors are sRGB bytes. Both color types are written
+        # through color_srgb so they show the same colors, BYTE_COLOR
+        # only stores them in a quarter of the memory.
+        rcl = mesh.attributes.new("RhinoColor", color_type, "POINT")
+        colors = vcls.astype(np.float32).ravel() / np.float32(255.0)
+        rcl.data.foreach_set("color_srgb", colors)
+
+        mesh.validate()
+        mesh.update()
+
+    if is_proxy:
+        # vertex clustering can leave duplicate or folded faces behind
+        mesh.validate()
+        mesh["rhproxy"] = proxy_mode
+
+    if (needs_welding and merge_vertices_enabled) or is_proxy:
+        if needs_welding and weld_engine == "BMESH":
+            bm = bmesh.new()
+            bm.from_mesh(mesh)
+            bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=merge_dist)
+            bm.to_mesh(mesh)
+            bm.free()
+        # custom normals define the shading, no sharp edges needed
+        if not use_normals:
+            if bpy.app.version >= (4, 1):
+                mesh.set_sharp_from_angle(angle=0.523599) # 30deg
+            else:
+                mesh.use_auto_smooth = True
+
+    if use_normals:
+        if len(mesh.loops) == len(buffers.normals):
+            if bpy.app.version < (4, 1):
+                mesh.use_auto_smooth = True
+            mesh.normals_split_custom_set(buffers.normals)
         else:
-            mesh.use_auto_smooth = True
+            print(f"Mesh '{name}' lost faces while welding, Rhino normals not applied")
+
+    if cache_key is not None:
+        _mesh_cache[cache_key] = (mesh, cache_nbytes)
 
     # done, now add object to blender
     return mesh
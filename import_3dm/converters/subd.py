@@ -0,0 +1,122 @@
+# MIT License
+
+# Copyright (c) 2018-2024 Nathan Letwory, Joel Putnam, Tom Svilans, Lukas Fertig
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# *** SubD subdivision levels from a scene-wide face budget
+
+import numpy as np
+
+MODIFIER_NAME = "SubD"
+
+
+def estimate_faces(polygons : np.ndarray, loops : np.ndarray, level) -> np.ndarray:
+    """
+    Estimate the evaluated face count of control nets with the given
+    polygon and face corner counts at a subdivision level. The first
+    level turns every n-gon into n quads, every further level splits
+    each quad into four.
+    """
+    level = np.asarray(level)
+    return np.where(level > 0, loops * 4 ** np.maximum(level - 1, 0), polygons).astype(np.int64)
+
+
+def choose_levels(polygons : np.ndarray, loops : np.ndarray, budget : int, max_level : int) -> np.ndarray:
+    """
+    Pick a subdivision level for every control net so the summed face
+    estimate stays within budget. Levels are raised one step at a time
+    for all nets, the cheapest nets first, so small nets reach higher
+    levels before large ones.
+    """
+    levels = np.zeros(len(polygons), dtype=np.int64)
+    total = int(polygons.sum())
+    for level in range(1, max_level + 1):
+        candidates = np.flatnonzero(levels == level - 1)
+        if not len(candidates):
+            break
+        cost = estimate_faces(polygons[candidates], loops[candidates], level) - estimate_faces(polygons[candidates], loops[candidates], level - 1)
+        order = np.argsort(cost, kind='stable')
+        fits = np.cumsum(cost[order]) <= budget - total
+        raised = candidates[order[fits]]
+        levels[raised] = level
+        total += int(cost[order[fits]].sum())
+    return levels
+
+
+def add_subd_modifier(blender_object, options) -> None:
+    """
+    Add the subdivision modifier to an imported SubD. Levels are only
+    assigned by apply_subd_levels once all SubDs of the file are known.
+    """
+    if blender_object.modifiers.find(MODIFIER_NAME) != -1:
+        return
+    modifier = blender_object.modifiers.new(type="SUBSURF", name=MODIFIER_NAME)
+    modifier.levels = 0
+    modifier.render_levels = 0
+    options.setdefault("subd_objects", []).append(blender_object)
+
+
+def _use_adaptive_subdivision(blender_object, modifier) -> None:
+    # adaptive subdivision is evaluated by Cycles at render time. Newer
+    # Blender versions keep it on the modifier, older ones on the object
+    if hasattr(modifier, "use_adaptive_subdivision"):
+        modifier.use_adaptive_subdivision = True
+    elif hasattr(blender_object, "cycles") and hasattr(blender_object.cycles, "use_adaptive_subdivision"):
+        blender_object.cycles.use_adaptive_subdivision = True
+
+
+def apply_subd_levels(options) -> None:
+    """
+    Distribute the face budget over all SubDs added during this import
+    and set viewport and render levels on their modifiers. The estimated
+    face total is stored in options for the import summary.
+    """
+    objects = options.get("subd_objects", [])
+    if not objects:
+        return
+
+    budget = options.get("subd_face_budget", 2000000)
+    max_level = options.get("subd_max_level", 3)
+    adaptive = options.get("subd_adaptive", False)
+
+    polygons = np.array([len(o.data.polygons) for o in objects], dtype=np.int64)
+    loops = np.array([len(o.data.loops) for o in objects], dtype=np.int64)
+
+    levels = choose_levels(polygons, loops, budget, max_level)
+
+    # the render level of each net is only limited by the budget on its
+    # own, renders evaluate one object at a time
+    render_levels = np.zeros_like(levels)
+    for level in range(1, max_level + 1):
+        render_levels[estimate_faces(polygons, loops, level) <= budget] = level
+    render_levels = np.maximum(render_levels, levels)
+
+    viewport_faces = int(estimate_faces(polygons, loops, levels).sum())
+    render_faces = int(estimate_faces(polygons, loops, render_levels).sum())
+    print(f"SubD: {len(objects)} objects, ~{viewport_faces} viewport faces, ~{render_faces} render faces (budget {budget})")
+    options["subd_estimate"] = (len(objects), viewport_faces, render_faces)
+
+    for blender_object, level, render_level in zip(objects, levels, render_levels):
+        modifier = blender_object.modifiers[MODIFIER_NAME]
+        modifier.levels = int(level)
+        modifier.render_levels = int(render_level)
+        if adaptive:
+            _use_adaptive_subdivision(blender_object, modifier)
@@ -0,0 +1,219 @@
+# MIT License
+
+# Copyright (c) 2018-2024 Nathan Letwory, Joel Putnam, Tom Svilans, Lukas Fertig
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# *** tessellation of Brep faces without render meshes
+
+import time
+import numpy as np
+
+from . import nurbs
+from .linework import sample_nurbs
+
+# most grid lines per face direction
+_MAX_GRID = 512
+# grid points tested at once against the trim polygons
+_INSIDE_CHUNK = 4096
+
+
+def _initial_params(knots : np.ndarray, degree : int, t0 : float, t1 : float) -> np.ndarray:
+    # every knot span of the domain, subdivided by the degree
+    knots = np.union1d(knots[(knots >= t0) & (knots <= t1)], (t0, t1))
+    steps = 2 * degree if degree > 1 else 1
+    return np.concatenate([np.linspace(a, b, steps, endpoint=False) for a, b in zip(knots[:-1], knots[1:])] + [[t1]])
+
+
+def _refine(params : np.ndarray, grid : np.ndarray, mids : np.ndarray, tolerance : float, angle : float) -> np.ndarray:
+    """
+    Return the indices of the intervals between params, running along
+    the first axis of grid, that need splitting: where the middle of a
+    chord is further than tolerance from the surface, or where the
+    chords on both sides of a grid line turn more than angle. Chords
+    shorter than a few tolerances are left alone, they only turn at
+    creases.
+    """
+    deviation = np.linalg.norm(mids - (grid[:-1] + grid[1:]) * 0.5, axis=2).max(axis=1)
+    split = deviation > tolerance
+    if angle > 0.0 and len(params) > 2:
+        chords = grid[1:] - grid[:-1]
+        lengths = np.linalg.norm(chords, axis=2)
+        dots = np.einsum('ijk,ijk->ij', chords[:-1], chords[1:])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cos = dots / (lengths[:-1] * lengths[1:])
+        turning = np.nan_to_num(np.arccos(np.clip(cos, -1.0, 1.0))) > angle
+        turning &= np.minimum(lengths[:-1], lengths[1:]) > 4.0 * tolerance
+        turning = turning.any(axis=1)
+        split[:-1] |= turning
+        split[1:] |= turning
+    return np.flatnonzero(split)
+
+
+def surface_grid(data : nurbs.NurbsSurfaceData, domain_u, domain_v, tolerance : float, angle : float):
+    """
+    Choose grid parameters in u and v so the grid is within tolerance
+    and angle of the surface, then evaluate it. Returns (u, v, points).
+    """
+    u = _initial_params(data.knots_u, data.degree_u, *domain_u)
+    v = _initial_params(data.knots_v, data.degree_v, *domain_v)
+    grid = nurbs.evaluate_surface_grid(data, u, v)
+    while True:
+        mid_u = (u[:-1] + u[1:]) * 0.5
+        mid_v = (v[:-1] + v[1:]) * 0.5
+        split_u = _refine(u, grid, nurbs.evaluate_surface_grid(data, mid_u, v), tolerance, angle) if len(u) < _MAX_GRID else []
+        split_v = _refine(v, grid.swapaxes(0, 1), nurbs.evaluate_surface_grid(data, u, mid_v).swapaxes(0, 1), tolerance, angle) if len(v) < _MAX_GRID else []
+        if not len(split_u) and not len(split_v):
+            return u, v, grid
+        u = np.insert(u, np.asarray(split_u, dtype=np.int64) + 1, mid_u[split_u])
+        v = np.insert(v, np.asarray(split_v, dtype=np.int64) + 1, mid_v[split_v])
+        grid = nurbs.evaluate_surface_grid(data, u, v)
+
+
+def _merge_params(params : np.ndarray, extra : np.ndarray, domain) -> np.ndarray:
+    # add grid lines through the trim polygon vertices inside the domain
+    extra = np.unique(extra[(extra > domain[0]) & (extra < domain[1])])
+    if len(extra) > _MAX_GRID:
+        extra = extra[np.linspace(0, len(extra) - 1, _MAX_GRID).astype(np.int64)]
+    return np.union1d(params, extra)
+
+
+def trim_polygons(face, tolerance : float):
+    """
+    Return the trim loops of a face as polygons in surface parameter
+    space, or None when this rhino3dm build does not expose them.
+    """
+    loops = getattr(face, "Loops", None)
+    if loops is None:
+        return None
+    polygons = list()
+    for loop in loops:
+        points = list()
+        for trim in loop.Trims:
+            nc = trim.ToNurbsCurve()
+            if nc is not None:
+                points.append(sample_nurbs(nc, tolerance)[:, :2])
+        if points:
+            polygons.append(np.concatenate(points))
+    return polygons
+
+
+def inside(points : np.ndarray, polygons) -> np.ndarray:
+    """
+    Even-odd test of 2D points against all polygons together, so inner
+    loops cut holes into the outer loop.
+    """
+    a = np.concatenate([p for p in polygons])
+    b = np.concatenate([np.roll(p, -1, axis=0) for p in polygons])
+    result = np.zeros(len(points), dtype=bool)
+    for start in range(0, len(points), _INSIDE_CHUNK):
+        pts = points[start:start + _INSIDE_CHUNK, None, :]
+        crosses = (a[None, :, 1] > pts[:, :, 1]) != (b[None, :, 1] > pts[:, :, 1])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x = a[None, :, 0] + (pts[:, :, 1] - a[None, :, 1]) * (b[None, :, 0] - a[None, :, 0]) / (b[None, :, 1] - a[None, :, 1])
+        result[start:start + _INSIDE_CHUNK] = (np.count_nonzero(crosses & (pts[:, :, 0] < x), axis=1) % 2) == 1
+    return result
+
+
+def tessellate_face(face, tolerance : float, angle : float):
+    """
+    Tessellate a BrepFace into triangles on a surface parameter grid.
+    Triangles whose center lies outside the trim loops are dropped, the
+    trimmed boundary is therefore stepped at grid resolution. Without
+    trim loops the whole surface domain is tessellated. Returns
+    (vertices, triangles, uvs) with uvs the normalized surface
+    parameters, or None when the face can't be tessellated.
+    """
+    ns = face.ToNurbsSurface()
+    if ns is None:
+        return None
+    data = nurbs.from_rhino_surface(ns)
+    domain_u = (ns.Domain(0).T0, ns.Domain(0).T1)
+    domain_v = (ns.Domain(1).T0, ns.Domain(1).T1)
+    polygons = trim_polygons(face, min(domain_u[1] - domain_u[0], domain_v[1] - domain_v[0]) * 1e-3)
+    u, v, grid = surface_grid(data, domain_u, domain_v, tolerance, angle)
+    if polygons:
+        # grid lines through the trim vertices follow straight trims
+        # exactly, otherwise the boundary is stepped at grid resolution
+        points = np.concatenate(polygons)
+        u = _merge_params(u, points[:, 0], domain_u)
+        v = _merge_params(v, points[:, 1], domain_v)
+        grid = nurbs.evaluate_surface_grid(data, u, v)
+
+    nu, nv = len(u), len(v)
+    index = np.arange(nu * nv).reshape(nu, nv)
+    a = index[:-1, :-1].ravel()
+    b = index[1:, :-1].ravel()
+    c = index[1:, 1:].ravel()
+    d = index[:-1, 1:].ravel()
+    triangles = np.concatenate((np.stack((a, b, c), axis=1), np.stack((a, c, d), axis=1)))
+    if getattr(face, "OrientationIsReversed", False):
+        triangles = triangles[:, ::-1]
+
+    params = np.stack(np.meshgrid(u, v, indexing='ij'), axis=2).reshape(-1, 2)
+    if polygons:
+        centers = params[triangles].mean(axis=1)
+        triangles = triangles[inside(centers, polygons)]
+
+    used, triangles = np.unique(triangles, return_inverse=True)
+    triangles = triangles.reshape(-1, 3).astype(np.int32)
+    lo = np.array((domain_u[0], domain_v[0]))
+    size = np.array((domain_u[1] - domain_u[0], domain_v[1] - domain_v[0]))
+    uvs = (params[used] - lo) / np.where(size > 0.0, size, 1.0)
+    return grid.reshape(-1, 3)[used], triangles, uvs
+
+
+def tessellate_missing_faces(og, faces, name, scale, options):
+    """
+    Tessellate the faces of Brep og listed in faces, those without a
+    render mesh, within the time budget of the file. Trimmed faces are
+    only tessellated when their trim loops are available, otherwise the
+    whole surface would fill holes and cut outs. Returns a list of
+    (vertices, triangles, uvs) in model units.
+    """
+    budget = options.get("tessellation_time_budget", 60.0)
+    spent = options.get("tessellation_time", 0.0)
+    tolerance = options.get("tessellation_tolerance", 0.001) / scale
+    angle = options.get("tessellation_angle", 0.349066)
+    # a Brep that is a surface has a single untrimmed face
+    untrimmed = getattr(og, "IsSurface", False)
+
+    results = list()
+    skipped = 0
+    for f in faces:
+        face = og.Faces[f]
+        if spent >= budget:
+            if not options.get("tessellation_budget_spent", False):
+                print(f"Tessellation time budget of {budget:.0f}s spent, remaining faces without render mesh stay empty")
+                options["tessellation_budget_spent"] = True
+            break
+        if getattr(face, "Loops", None) is None and not untrimmed:
+            skipped += 1
+            continue
+        t0 = time.perf_counter()
+        result = tessellate_face(face, tolerance, angle)
+        spent += time.perf_counter() - t0
+        if result is not None and len(result[1]):
+            results.append(result)
+
+    if skipped:
+        print(f"Brep '{name}': {skipped} trimmed faces without render mesh skipped, this rhino3dm build does not expose trim loops")
+    options["tessellation_time"] = spent
+    return results
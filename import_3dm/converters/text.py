@@ -0,0 +1,178 @@
+# MIT License
+
+# Copyright (c) 2018-2024 Nathan Letwory, Joel Putnam, Tom Svilans, Lukas Fertig
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# *** annotation text baked to mesh
+
+import bpy
+import numpy as np
+
+from .render_mesh import fill_mesh
+
+# every character is converted to mesh once per size, labels are put
+# together from the glyphs. The marker is appended to a character to
+# measure how far it advances the next one.
+_MARKER = "|"
+
+_glyph_cache = dict()
+_metrics_cache = dict()
+_label_cache = dict()
+
+def clear_glyph_cache() -> None:
+    global _glyph_cache, _metrics_cache, _label_cache
+    _glyph_cache = dict()
+    _metrics_cache = dict()
+    _label_cache = dict()
+
+
+def _font_mesh(body : str, size : float, align_y : str = 'TOP_BASELINE'):
+    """
+    Convert body set in the built-in font to mesh, returned as vertices,
+    loop_vertices and loop_totals arrays. The temporary datablocks are
+    removed again.
+    """
+    blend_data = bpy.context.blend_data
+    curve = blend_data.curves.new(name="glyph", type="FONT")
+    curve.body = body
+    curve.size = size
+    curve.align_x = 'LEFT'
+    curve.align_y = align_y
+    ob = blend_data.objects.new("glyph", curve)
+    mesh = blend_data.meshes.new_from_object(ob)
+
+    vertices = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    loop_vertices = np.empty(len(mesh.loops), dtype=np.int32)
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.vertices.foreach_get("co", vertices)
+    mesh.loops.foreach_get("vertex_index", loop_vertices)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+
+    blend_data.meshes.remove(mesh)
+    blend_data.objects.remove(ob)
+    blend_data.curves.remove(curve)
+    return (vertices.reshape(-1, 3), loop_vertices, loop_totals)
+
+
+def _metrics(size : float):
+    """
+    Offset of the top alignment relative to the baseline, the line
+    height and the right edge of the marker, for text of size.
+    """
+    metrics = _metrics_cache.get(size, None)
+    if metrics is None:
+        baseline = _font_mesh(_MARKER, size)[0]
+        top = _font_mesh(_MARKER, size, 'TOP')[0]
+        two_lines = _font_mesh(f"{_MARKER}\n{_MARKER}", size)[0]
+        metrics = (top[:, 1].max() - baseline[:, 1].max(), baseline[:, 1].min() - two_lines[:, 1].min(), baseline[:, 0].max())
+        _metrics_cache[size] = metrics
+    return metrics
+
+
+def _glyph(char : str, size : float):
+    """
+    Mesh arrays of char and the distance it advances the next
+    character.
+    """
+    key = (char, size)
+    glyph = _glyph_cache.get(key, None)
+    if glyph is None:
+        marked = _font_mesh(char + _MARKER, size)[0]
+        advance = marked[:, 0].max() - _metrics(size)[2]
+        glyph = _font_mesh(char, size) + (advance,)
+        _glyph_cache[key] = glyph
+    return glyph
+
+
+def label_mesh(txt : str, size : float, align_x : str, align_y : str):
+    """
+    Mesh arrays of a label put together from cached glyphs, aligned like
+    a text curve with the same settings.
+    """
+    key = (txt, size, align_x, align_y)
+    label = _label_cache.get(key, None)
+    if label is not None:
+        return label
+
+    top, line_height, _ = _metrics(size)
+    y = top if align_y == 'TOP' else 0.0
+    vertices = []
+    loop_vertices = []
+    loop_totals = []
+    vertex_count = 0
+    for line in txt.replace("\r\n", "\n").split("\n"):
+        glyphs = [_glyph(c, size) for c in line]
+        advances = np.array([g[3] for g in glyphs])
+        pen = np.cumsum(advances) - advances
+        width = advances.sum()
+        x = -width * 0.5 if align_x == 'CENTER' else -width if align_x == 'RIGHT' else 0.0
+        for (v, lv, lt, _), px in zip(glyphs, pen):
+            if not len(v):
+                continue
+            vertices.append(v + (x + px, y, 0.0))
+            loop_vertices.append(lv + vertex_count)
+            loop_totals.append(lt)
+            vertex_count += len(v)
+        y -= line_height
+
+    if vertices:
+        label = (np.concatenate(vertices), np.concatenate(loop_vertices), np.concatenate(loop_totals))
+    else:
+        label = (np.empty((0, 3), dtype=np.float32), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32))
+    _label_cache[key] = label
+    return label
+
+
+def import_text_mesh(context, texts, name):
+    """
+    Import labels as faces of one mesh. texts is a list of (id, text,
+    matrix) with text the (txt, size, align_x, align_y) of the label and
+    matrix its placement. Which faces came from which annotation is kept
+    in the rhcurve_ids and rhtext_faces custom properties, see
+    curve_id_for_spline.
+    """
+    ids = list()
+    face_starts = list()
+    vertices = list()
+    loop_vertices = list()
+    loop_totals = list()
+    vertex_count = 0
+    face_count = 0
+    for rhid, text, matrix in texts:
+        v, lv, lt = label_mesh(*text)
+        m = np.array(matrix, dtype=np.float64)
+        ids.append(rhid)
+        face_starts.append(face_count)
+        vertices.append(v @ m[:3, :3].T + m[:3, 3])
+        loop_vertices.append(lv + vertex_count)
+        loop_totals.append(lt)
+        vertex_count += len(v)
+        face_count += len(lt)
+    face_starts.append(face_count)
+
+    mesh = context.blend_data.meshes.new(name=name)
+    if vertices:
+        fill_mesh(mesh, np.concatenate(vertices), np.concatenate(loop_vertices), np.concatenate(loop_totals))
+
+    mesh["rhcurve_ids"] = ",".join(ids)
+    mesh["rhtext_faces"] = face_starts
+
+    return mesh
@@ -23,8 +23,12 @@
 # *** data tagging
 
 import bpy
+import sys
 import uuid
 import rhino3dm as r3d
+import numpy as np
+from itertools import chain
+from operator import attrgetter
 from mathutils import Matrix
 
 from typing import Any, Dict
@@ -177,4 +181,82 @@ def matrix_from_xform(xform : r3d.Transform):
             (xform.M20, xform.M21, xform.M22, xform.M23),
             (xform.M30, xform.M31, xform.M32, xform.M33))
      )
-     return m
\ No newline at end of file
+     return m
+
+
+# *** bulk data access
+
+def points_to_array(points, count : int, dims : int = 3, dtype = np.float64, start : int = 0) -> np.ndarray:
+    """
+    Gather the X, Y (and Z, W) components of count items of an
+    indexable rhino3dm point list, from start on, into a (count, dims)
+    array. Whole lists that expose ToFloatArray are copied in one call,
+    other lists are read item by item without building intermediate
+    tuples.
+    """
+    if count == 0:
+        return np.empty((0, dims), dtype=dtype)
+    to_float_array = getattr(points, "ToFloatArray", None)
+    if to_float_array is not None and start == 0 and len(points) == count:
+        buf = np.asarray(to_float_array(), dtype=dtype)
+        if buf.size == count * dims:
+            return buf.reshape(count, dims)
+    get = attrgetter(*("X", "Y", "Z", "W")[:dims])
+    it = chain.from_iterable(get(points[i]) for i in range(start, start + count))
+    return np.fromiter(it, dtype=dtype, count=count * dims).reshape(count, dims)
+
+def tuples_to_array(items, count : int, dims : int, dtype = np.int32, start : int = 0) -> np.ndarray:
+    """
+    Gather count items, from start on, of an indexable rhino3dm list
+    whose items are fixed size tuples, like mesh faces or vertex colors,
+    into a (count, dims) array.
+    """
+    if count == 0:
+        return np.empty((0, dims), dtype=dtype)
+    it = chain.from_iterable(items[i] for i in range(start, start + count))
+    return np.fromiter(it, dtype=dtype, count=count * dims).reshape(count, dims)
+
+def chunks(count : int, size : int):
+    """
+    Yield (start, count) pairs covering range(count) in steps of size.
+    """
+    for start in range(0, count, size):
+        yield start, min(size, count - start)
+
+def peak_rss() -> int:
+    """
+    Peak resident set size of this process in bytes, 0 when unknown.
+    """
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize
+    except (ImportError, AttributeError, OSError):
+        pass
+    return 0
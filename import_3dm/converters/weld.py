@@ -0,0 +1,176 @@
+# MIT License
+
+# Copyright (c) 2018-2024 Nathan Letwory, Joel Putnam, Tom Svilans, Lukas Fertig
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# *** vertex welding on flat mesh buffers
+
+import numpy as np
+
+# large primes for hashing grid cells. Collisions only add candidate
+# pairs that are rejected by the distance test, so wrapping is fine.
+_P1, _P2, _P3 = np.int64(73856093), np.int64(19349663), np.int64(83492791)
+
+# the cell itself and half of its 26 neighbours, every pair of adjacent
+# cells is visited exactly once
+_NEIGHBOURS = np.array([(0, 0, 0)] + [(x, y, z) for x in (-1, 0, 1) for y in (-1, 0, 1) for z in (-1, 0, 1) if (x, y, z) > (0, 0, 0)], dtype=np.int64)
+
+
+def _hash_cells(cells : np.ndarray) -> np.ndarray:
+    with np.errstate(over='ignore'):
+        return (cells[:, 0] * _P1) ^ (cells[:, 1] * _P2) ^ (cells[:, 2] * _P3)
+
+
+def _next_corner(loop_totals : np.ndarray) -> np.ndarray:
+    """
+    For every face corner the index of the following corner of the
+    same face, wrapping around at the end of the face.
+    """
+    loop_starts = np.cumsum(loop_totals) - loop_totals
+    nxt = np.arange(1, loop_totals.sum() + 1)
+    nxt[loop_starts + loop_totals - 1] = loop_starts
+    return nxt
+
+
+def naked_vertices(loop_vertices : np.ndarray, loop_totals : np.ndarray, vertex_count : int) -> np.ndarray:
+    """
+    Return a boolean mask of vertices on edges used by only one face.
+    For Brep render meshes these are the seams between face meshes.
+    """
+    a = loop_vertices.astype(np.int64)
+    b = a[_next_corner(loop_totals)]
+    keys = np.minimum(a, b) * vertex_count + np.maximum(a, b)
+    _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    naked = counts[inverse] == 1
+    mask = np.zeros(vertex_count, dtype=bool)
+    mask[a[naked]] = True
+    mask[b[naked]] = True
+    return mask
+
+
+def find_doubles(vertices : np.ndarray, distance : float, candidates : np.ndarray = None) -> np.ndarray:
+    """
+    Find vertices closer than distance to each other using a spatial
+    hash with cells of size distance. Only the neighbouring cells of
+    each vertex are searched. When candidates is given only those
+    vertices are considered.
+
+    Returns for every vertex the index of the vertex it merges into,
+    which is the lowest index of its cluster.
+    """
+    labels = np.arange(len(vertices))
+    idx = labels if candidates is None else np.flatnonzero(candidates)
+    if len(idx) < 2 or distance <= 0.0:
+        return labels
+
+    pts = vertices[idx]
+    cells = np.floor(pts / distance).astype(np.int64)
+    keys = _hash_cells(cells)
+    order = np.argsort(keys, kind='stable')
+    cell_keys, cell_starts, cell_counts = np.unique(keys[order], return_index=True, return_counts=True)
+
+    dist2 = distance * distance
+    pairs_a = []
+    pairs_b = []
+    for n, offset in enumerate(_NEIGHBOURS):
+        nkeys = _hash_cells(cells + offset)
+        pos = np.searchsorted(cell_keys, nkeys)
+        pos[pos == len(cell_keys)] = 0
+        p = np.flatnonzero(cell_keys[pos] == nkeys)
+        pos = pos[p]
+        rank = 0
+        while len(p):
+            q = order[cell_starts[pos] + rank]
+            d = pts[p] - pts[q]
+            close = np.einsum('ij,ij->i', d, d) <= dist2
+            if n == 0:
+                close &= p < q
+            pairs_a.append(p[close])
+            pairs_b.append(q[close])
+            rank += 1
+            more = cell_counts[pos] > rank
+            p = p[more]
+            pos = pos[more]
+
+    a = np.concatenate(pairs_a)
+    b = np.concatenate(pairs_b)
+    if not len(a):
+        return labels
+
+    # connected components by label propagation and pointer jumping
+    local = np.arange(len(idx))
+    while True:
+        lo = np.minimum(local[a], local[b])
+        before = local.copy()
+        np.minimum.at(local, a, lo)
+        np.minimum.at(local, b, lo)
+        local = local[local]
+        if np.array_equal(before, local):
+            break
+
+    labels[idx] = idx[local]
+    return labels
+
+
+def weld_buffers(buffers, distance : float, seams_only : bool = False):
+    """
+    Merge vertices of MeshBuffers closer than distance and remap the face
+    corners. With seams_only, only vertices on naked edges are welded,
+    which is where Brep face meshes meet.
+    """
+    candidates = naked_vertices(buffers.loop_vertices, buffers.loop_totals, len(buffers.vertices)) if seams_only else None
+    labels = find_doubles(buffers.vertices, distance, candidates)
+    return collapse_vertices(buffers, labels)
+
+
+def collapse_vertices(buffers, labels : np.ndarray):
+    """
+    Merge every vertex of MeshBuffers into the vertex labels points to,
+    which must be the label of its own cluster. Corners collapsing onto
+    their neighbour are removed, as are faces left with fewer than three
+    corners.
+    """
+    vertices = buffers.vertices
+    loop_vertices = buffers.loop_vertices
+    loop_totals = buffers.loop_totals
+
+    kept = labels == np.arange(len(vertices))
+    if kept.all():
+        return buffers
+
+    new_index = np.cumsum(kept) - 1
+    loop_vertices = new_index[labels[loop_vertices]].astype(np.int32)
+
+    # drop corners that now repeat the following corner of their face
+    corner_face = np.repeat(np.arange(len(loop_totals)), loop_totals)
+    keep_corner = loop_vertices != loop_vertices[_next_corner(loop_totals)]
+    loop_totals = np.bincount(corner_face[keep_corner], minlength=len(loop_totals)).astype(np.int32)
+    keep_face = loop_totals >= 3
+    keep_corner &= keep_face[corner_face]
+
+    buffers.vertices = vertices[kept]
+    buffers.loop_vertices = loop_vertices[keep_corner]
+    buffers.loop_totals = loop_totals[keep_face]
+    buffers.coords = [c[keep_corner] for c in buffers.coords]
+    if buffers.colors is not None:
+        buffers.colors = buffers.colors[kept]
+    if buffers.normals is not None:
+        buffers.normals = buffers.normals[keep_corner]
+    return buffers
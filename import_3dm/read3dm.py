@@ -82,6 +82,65 @@ def create_or_get_top_layer(context, filepath):
     return toplayer
 
 
+def model_scale(context : bpy.types.Context, model : r3d.File3dm) -> float:
+    if model.Settings is not None:
+        return r3d.UnitSystem.UnitScale(model.Settings.ModelUnitSystem, r3d.UnitSystem.Meters) / context.scene.unit_settings.scale_length
+    # Fallback to 1:1 scale if Settings is missing
+    print("Warning: 3DM file has no settings, using 1:1 scale")
+    return 1.0 / context.scene.unit_settings.scale_length
+
+
+def print_import_summary(options : Dict[str, Any]) -> None:
+    print("Import summary:")
+    pose_instances = options.get("pose_instances", {})
+    if pose_instances:
+        groups = len(set(key for key, _ in pose_instances.values()))
+        print(f"  Transformed duplicates: {len(pose_instances)} objects share {groups} meshes")
+    if options.get("tessellation_time", 0.0) > 0.0:
+        print(f"  Tessellation of Brep faces without render mesh: {options['tessellation_time']:.2f}s")
+    block_population = options.get("block_population", None)
+    if block_population is not None:
+        print(f"  Block definitions: {block_population[0]} populated in {block_population[1]:.2f}s")
+    subd_estimate = options.get("subd_estimate", None)
+    if subd_estimate is not None:
+        print(f"  SubD: {subd_estimate[0]} objects, ~{subd_estimate[1]} viewport faces, ~{subd_estimate[2]} render faces")
+    if options.get("mesh_cache", True):
+        stats = converters.mesh_cache_stats()
+        print(f"  Mesh cache: {stats['hits']} hits, {stats['misses']} misses, ~{stats['bytes_saved'] / (1024 * 1024):.1f} MB of mesh data shared")
+
+
+# import toggle for every object type that can be switched off
+_TYPE_OPTIONS = {
+    r3d.ObjectType.Curve: "import_curves",
+    r3d.ObjectType.Annotation: "import_annotations",
+    r3d.ObjectType.PointSet: "import_pointset",
+    r3d.ObjectType.Brep: "import_brep",
+    r3d.ObjectType.Extrusion: "import_extrusions",
+    r3d.ObjectType.SubD: "import_subd",
+    r3d.ObjectType.Mesh: "import_meshes",
+}
+
+def is_imported(model : r3d.File3dm, ob : r3d.File3dmObject, options : Dict[str, Any]) -> bool:
+    """
+    Whether ob passes the object type toggles and the hidden object and
+    layer settings of options.
+    """
+    type_option = _TYPE_OPTIONS.get(ob.Geometry.ObjectType, None)
+    if type_option is not None and not options.get(type_option, False):
+        return False
+
+    # Check object visibility
+    attr = ob.Attributes
+    if not attr.Visible and not options.get("import_hidden_objects", False):
+        return False
+
+    # Check object layer visibility
+    rhinolayer = model.Layers.FindIndex(attr.LayerIndex)
+    if not rhinolayer.Visible and not options.get("import_hidden_layers", False):
+        return False
+    return True
+
+
 def read_3dm(
         context : bpy.types.Context,
         options : Dict[str, Any]
@@ -91,20 +150,16 @@ def read_3dm(
 
     # Parse options
     import_views = options.get("import_views", False)
-    import_annotations = options.get("import_annotations", False)
-    import_curves = options.get("import_curves", False)
-    import_pointset = options.get("import_pointset", False)
-    import_meshes = options.get("import_meshes", False)
-    import_subd = options.get("import_subd", False)
-    import_extrusions = options.get("import_extrusions", False)
-    import_brep = options.get("import_brep", False)
     import_named_views = options.get("import_named_views", False)
-    import_hidden_objects = options.get("import_hidden_objects", False)
     import_hidden_layers = options.get("import_hidden_layers", False)
     import_groups = options.get("import_groups", False)
     import_nested_groups = options.get("import_nested_groups", False)
     import_instances = options.get("import_instances",False)
     update_materials = options.get("update_materials", False)
+    merge_curves = options.get("merge_curves", False)
+    merge_annotations = options.get("merge_annotations", False)
+    curves_as_edges = options.get("curves_as", "CURVE") == "EDGE_MESH"
+    pointcloud_tiling = options.get("pointcloud_tiling", False)
 
     filepath : str = options.get("filepath", "")
     model = None
@@ -128,12 +183,7 @@ def read_3dm(
     toplayer = create_or_get_top_layer(context, filepath)
 
     # Get proper scale for conversion
-    if model.Settings is not None:
-        scale = r3d.UnitSystem.UnitScale(model.Settings.ModelUnitSystem, r3d.UnitSystem.Meters) / context.scene.unit_settings.scale_length
-    else:
-        # Fallback to 1:1 scale if Settings is missing
-        print("Warning: 3DM file has no settings, using 1:1 scale")
-        scale = 1.0 / context.scene.unit_settings.scale_length
+    scale = model_scale(context, model)
 
     layerids = {}
     materials = {}
@@ -150,10 +200,23 @@ def read_3dm(
     # Handle layers
     converters.handle_layers(context, model, toplayer, layerids, materials, update_materials, import_hidden_layers)
 
+    # find translated/rotated copies of mesh objects so they can share
+    # mesh data
+    if options.get("detect_transformed_duplicates", False):
+        objects = [ob for ob in model.Objects if is_imported(model, ob, options)]
+        options["pose_instances"] = converters.find_transformed_duplicates(objects, scale, options)
+
     #build skeletal hierarchy of instance definitions as collections (will be populated by object importer)
     if import_instances:
         converters.handle_instance_definitions(context, model, toplayer, "Instance Definitions", options)
 
+    # curves merged per layer, material and view color, into curves or
+    # edge meshes
+    curve_batches = {}
+    edge_batches = {}
+    # annotations merged per layer, dimension style and view color
+    annotation_batches = {}
+
     # Handle objects
     ob : r3d.File3dmObject = None
     for ob in model.Objects:
@@ -164,31 +227,11 @@ def read_3dm(
             print("Unsupported object type: {}".format(og.ObjectType))
             continue
 
-        if not import_curves and og.ObjectType == r3d.ObjectType.Curve:
-            continue
-        if not import_annotations and og.ObjectType == r3d.ObjectType.Annotation:
-            continue
-        if not import_pointset and og.ObjectType == r3d.ObjectType.PointSet:
+        if not is_imported(model, ob, options):
             continue
-        if not import_brep and og.ObjectType == r3d.ObjectType.Brep:
-            continue
-        if not import_extrusions and og.ObjectType == r3d.ObjectType.Extrusion:
-            continue
-        if not import_subd and og.ObjectType == r3d.ObjectType.SubD:
-            continue
-        if not import_meshes and og.ObjectType == r3d.ObjectType.Mesh:
-            continue
-
 
-        # Check object visibility
         attr = ob.Attributes
-        if not attr.Visible and not import_hidden_objects:
-            continue
-
-        # Check object layer visibility
         rhinolayer = model.Layers.FindIndex(attr.LayerIndex)
-        if not rhinolayer.Visible and not import_hidden_layers:
-            continue
 
         # Create object name if none exists or it is an empty string.
         # Otherwise use the name from the 3dm file.
@@ -232,15 +275,50 @@ def read_3dm(
         if og.ObjectType==r3d.ObjectType.InstanceReference and import_instances:
             object_name = model.InstanceDefinitions.FindId(og.ParentIdefId).Name
 
+        if curves_as_edges and og.ObjectType == r3d.ObjectType.Curve and not attr.IsInstanceDefinitionObject:
+            key = (str(rhinolayer.Id), blender_material.name, tuple(view_color))
+            edge_batches.setdefault(key, (layer, blender_material, view_color, []))[3].append(ob)
+            continue
+        if merge_curves and og.ObjectType == r3d.ObjectType.Curve and not attr.IsInstanceDefinitionObject:
+            key = (str(rhinolayer.Id), blender_material.name, tuple(view_color))
+            curve_batches.setdefault(key, (layer, blender_material, view_color, []))[3].append(ob)
+            continue
+
+        if merge_annotations and og.ObjectType == r3d.ObjectType.Annotation and not attr.IsInstanceDefinitionObject:
+            key = (str(rhinolayer.Id), str(og.DimensionStyleId), tuple(view_color))
+            annotation_batches.setdefault(key, (layer, blender_material, view_color, []))[3].append(ob)
+            continue
+
+        if pointcloud_tiling and og.ObjectType == r3d.ObjectType.PointSet and not attr.IsInstanceDefinitionObject:
+            converters.convert_pointcloud_tiles(context, ob, object_name, layer, blender_material, view_color, scale, options)
+            continue
+
         # Convert object
         converters.convert_object(context, ob, object_name, layer, blender_material, view_color, scale, options)
 
         if import_groups:
             converters.handle_groups(context,attr,toplayer,import_nested_groups)
 
+    for layer, blender_material, view_color, obs in curve_batches.values():
+        converters.convert_curve_batch(context, obs, layer, blender_material, view_color, scale, options)
+    for layer, blender_material, view_color, obs in edge_batches.values():
+        converters.convert_edge_mesh(context, obs, layer, blender_material, view_color, scale, options)
+    for layer, blender_material, view_color, obs in annotation_batches.values():
+        converters.convert_annotation_batch(context, obs, layer, blender_material, view_color, scale, options)
+    for layer_index, texts in options.get("text_meshes", {}).items():
+        rhinolayer = model.Layers.FindIndex(layer_index)
+        layer = layerids[str(rhinolayer.Id)][1]
+        converters.convert_text_mesh(context, texts, layer, materials[converters.material.DEFAULT_TEXT_MATERIAL], rhinolayer.Color, options)
+
     if import_instances:
         converters.populate_instance_definitions(context, model, toplayer, "Instance Definitions", options, scale)
 
+    # arrowheads of all annotations are placed in one pass
+    converters.flush_arrows()
+
+    # subdivision levels depend on all SubDs in the file
+    converters.apply_subd_levels(options)
+
     # finally link in the container collection (top layer) into the main
     # scene collection.
     if toplayer.name not in context.scene.collection.children:
@@ -251,6 +329,51 @@ def read_3dm(
         with context.temp_override(selected_editable_objects=toplayer.all_objects):
             bpy.ops.object.shade_smooth()
 
+    print_import_summary(options)
+
     converters.cleanup()
 
     return {'FINISHED'}
+
+
+def replace_proxies(
+        context : bpy.types.Context,
+        objects,
+        options : Dict[str, Any]
+    )   -> int:
+    """
+    Replace the stand-ins among objects with their full render meshes.
+    Every 3dm file is read once, only the objects of the stand-ins are
+    converted. Returns the number of replaced objects.
+    """
+    by_file = {}
+    for blender_object in objects:
+        if blender_object.get("rhproxy", None):
+            by_file.setdefault(blender_object.get("rhfile", ""), []).append(blender_object)
+
+    replaced = 0
+    for filepath, proxies in by_file.items():
+        try:
+            model = r3d.File3dm.Read(filepath)
+        except:
+            model = None
+        if model is None:
+            print("Failed to read .3dm file: {}".format(filepath))
+            continue
+
+        converters.initialize(context)
+        scale = model_scale(context, model)
+        wanted = {blender_object["rhid"]: blender_object for blender_object in proxies}
+        for ob in model.Objects:
+            blender_object = wanted.pop(str(ob.Attributes.Id), None)
+            if blender_object is None:
+                continue
+            converters.replace_proxy(context, ob, blender_object, scale, options)
+            replaced += 1
+            if not wanted:
+                break
+        for blender_object in wanted.values():
+            print(f"Object '{blender_object.name}' not found in {filepath}")
+        converters.cleanup()
+
+    return replaced
@@ -0,0 +1,66 @@
+#!python3
+"""
+Benchmark point cloud import, run with pytest-blender:
+
+    pytest -s test/bench_pointcloud.py
+
+Compares import_pointcloud against the previous from_pydata based
+construction and prints the throughput in points per second.
+"""
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+import bpy
+import addon_utils
+import rhino3dm as r3d
+
+
+POINTS = 200000
+
+
+@pytest.fixture(scope="session", autouse=True)
+def enable_addon():
+    addon_utils.enable("import_3dm")
+
+
+def _pointcloud(n):
+    pc = r3d.PointCloud()
+    for i in range(n):
+        pc.Add(r3d.Point3d(i % 1000, i // 1000, (i * 7) % 13), r3d.Vector3d(0.0, 0.0, 1.0), (i % 256, 128, 255 - i % 256, 255))
+    return SimpleNamespace(Geometry=pc, Attributes=SimpleNamespace(Id=uuid.uuid4(), Name="bench"))
+
+
+def _from_pydata_import(context, ob, scale):
+    # construction path used before foreach_set
+    og = ob.Geometry
+    vertices = [(og[v].X * scale, og[v].Y * scale, og[v].Z * scale) for v in range(og.Count)]
+    pointcloud = context.blend_data.meshes.new(name="bench_from_pydata")
+    pointcloud.from_pydata(vertices, [], [])
+    return pointcloud
+
+
+def _timed(f, *args):
+    t0 = time.perf_counter()
+    result = f(*args)
+    return result, time.perf_counter() - t0
+
+
+def test_bench_pointcloud():
+    from import_3dm import converters
+
+    context = bpy.context
+    converters.initialize(context)
+    ob = _pointcloud(POINTS)
+
+    old, t_old = _timed(_from_pydata_import, context, ob, 1.0)
+    new, t_new = _timed(converters.import_pointcloud, context, ob, "bench", 1.0, {})
+
+    print(f"\nfrom_pydata: {POINTS / t_old:.0f} points/s, foreach_set: {POINTS / t_new:.0f} points/s (with colors and normals)")
+    assert len(old.vertices) == len(new.vertices)
+    assert "RhinoColor" in new.attributes
+    assert "RhinoNormal" in new.attributes
+
+    converters.cleanup()
@@ -0,0 +1,104 @@
+#!python3
+"""
+Benchmark render mesh construction, run with pytest-blender:
+
+    pytest -s test/bench_render_mesh.py
+
+Compares import_render_mesh against the previous from_pydata based
+construction on a large Mesh and on a Brep made of many face meshes.
+"""
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+import bpy
+import addon_utils
+import rhino3dm as r3d
+
+
+GRID = 500          # 500 x 500 quads, 250k faces
+BREP_FACES = 2000   # face meshes per Brep
+FACE_GRID = 10      # 10 x 10 quads per face mesh
+
+
+@pytest.fixture(scope="session", autouse=True)
+def enable_addon():
+    addon_utils.enable("import_3dm")
+
+
+def _grid_mesh(n, x0=0.0):
+    m = r3d.Mesh()
+    for j in range(n + 1):
+        for i in range(n + 1):
+            m.Vertices.Add(x0 + i, j, 0.0)
+    for j in range(n):
+        for i in range(n):
+            a = j * (n + 1) + i
+            m.Faces.AddFace(a, a + 1, a + n + 2, a + n + 1)
+    return m
+
+
+class _BrepFace:
+    def __init__(self, mesh):
+        self._mesh = mesh
+
+    def GetMesh(self, _):
+        return self._mesh
+
+
+def _object(geometry):
+    return SimpleNamespace(Geometry=geometry, Attributes=SimpleNamespace(Id=uuid.uuid4(), Name="bench"))
+
+
+def _brep_object():
+    faces = [_BrepFace(_grid_mesh(FACE_GRID, x0=f * (FACE_GRID + 1))) for f in range(BREP_FACES)]
+    return _object(SimpleNamespace(ObjectType=r3d.ObjectType.Brep, Faces=faces))
+
+
+def _from_pydata_import(context, ob, scale):
+    # construction path used before buffers and foreach_set
+    og = ob.Geometry
+    if og.ObjectType == r3d.ObjectType.Mesh:
+        msh = [og]
+    else:
+        msh = [og.Faces[f].GetMesh(r3d.MeshType.Any) for f in range(len(og.Faces))]
+    fidx = 0
+    faces = []
+    vertices = []
+    for m in msh:
+        faces.extend([list(map(lambda x: x + fidx, m.Faces[f])) for f in range(len(m.Faces))])
+        for f in faces:
+            if f[-1] == f[-2]:
+                del f[-1]
+        fidx = fidx + len(m.Vertices)
+        vertices.extend([(m.Vertices[v].X * scale, m.Vertices[v].Y * scale, m.Vertices[v].Z * scale) for v in range(len(m.Vertices))])
+    mesh = context.blend_data.meshes.new("bench_from_pydata")
+    mesh.from_pydata(vertices, [], faces, shade_flat=False)
+    return mesh
+
+
+def _timed(f, *args):
+    t0 = time.perf_counter()
+    result = f(*args)
+    return result, time.perf_counter() - t0
+
+
+@pytest.mark.parametrize("make_object", [lambda: _object(_grid_mesh(GRID)), _brep_object], ids=["mesh", "brep"])
+def test_bench_render_mesh(make_object):
+    from import_3dm import converters
+
+    context = bpy.context
+    converters.initialize(context)
+    ob = make_object()
+    options = {"merge_vertices": False}
+
+    old, t_old = _timed(_from_pydata_import, context, ob, 1.0)
+    new, t_new = _timed(converters.import_render_mesh, context, ob, "bench", 1.0, options)
+
+    print(f"\nfrom_pydata: {t_old:.3f}s, buffers: {t_new:.3f}s, speedup {t_old / t_new:.1f}x")
+    assert len(old.polygons) == len(new.polygons)
+    assert len(old.loops) == len(new.loops)
+
+    converters.cleanup()
@@ -28,3 +28,44 @@ def enable_addon():
 @pytest.mark.parametrize("filepath", testfiles)
 def test_create_article(filepath):
     bpy.ops.import_3dm.some_data(filepath=filepath)
+
+
+def _imported_meshes(filepath, **kwargs):
+    before = set(bpy.data.collections.keys())
+    bpy.ops.import_3dm.some_data(filepath=filepath, **kwargs)
+    toplayer = [bpy.data.collections[c] for c in bpy.data.collections.keys() if c not in before][0]
+    return sorted((ob["rhid"], len(ob.data.vertices), len(ob.data.polygons)) for ob in toplayer.all_objects if ob.type == 'MESH')
+
+
+@pytest.mark.parametrize("filepath", testfiles)
+def test_weld_engines_match(filepath):
+    bmesh_result = _imported_meshes(filepath, weld_engine='BMESH')
+    numpy_result = _imported_meshes(filepath, weld_engine='NUMPY')
+    assert bmesh_result == numpy_result
+
+
+def _nested_block_file(path):
+    import rhino3dm as r3d
+
+    model = r3d.File3dm()
+    box = r3d.Box(r3d.BoundingBox(r3d.Point3d(0, 0, 0), r3d.Point3d(1, 1, 1))).ToBrep()
+    inner = model.InstanceDefinitions.Add("inner", "", "", "", r3d.Point3d(0, 0, 0), [box], [r3d.ObjectAttributes()])
+    # the reference to inner is only used as geometry of outer
+    reference_id = model.Objects.AddInstanceObject(inner, r3d.Transform.Translation(2, 0, 0))
+    reference = model.Objects.FindId(reference_id).Geometry
+    outer = model.InstanceDefinitions.Add("outer", "", "", "", r3d.Point3d(0, 0, 0), [reference], [r3d.ObjectAttributes()])
+    model.Objects.Delete(reference_id)
+    model.Objects.AddInstanceObject(outer, r3d.Transform.Identity())
+    model.Write(str(path), 8)
+    return str(model.InstanceDefinitions[inner].Id), str(model.InstanceDefinitions[outer].Id)
+
+
+def test_nested_block_instances_are_linked(tmp_path):
+    filepath = tmp_path / "nested_blocks.3dm"
+    inner_id, outer_id = _nested_block_file(filepath)
+    bpy.ops.import_3dm.some_data(filepath=str(filepath), import_instances=True)
+
+    outer = [c for c in bpy.data.collections if c.get("rhid") == outer_id][-1]
+    nested = [ob for ob in outer.objects if ob.instance_type == 'COLLECTION']
+    assert len(nested) == 1
+    assert nested[0].instance_collection.get("rhid") == inner_id
@@ -0,0 +1,41 @@
+#!python3
+import math
+
+import numpy as np
+import pytest
+
+import addon_utils
+import rhino3dm as r3d
+
+
+@pytest.fixture(scope="session", autouse=True)
+def enable_addon():
+    addon_utils.enable("import_3dm")
+
+
+def _curves():
+    points = [r3d.Point3d(math.cos(i * 0.7) * i, math.sin(i * 1.3), 0.1 * i * i) for i in range(9)]
+    circle = r3d.Circle(r3d.Point3d(1.0, 2.0, 3.0), 2.5)
+    arc = r3d.Arc(r3d.Point3d(0.0, 0.0, 0.0), 4.0, 2.0)
+    return {
+        "degree1": r3d.NurbsCurve.Create(False, 1, points),
+        "degree3": r3d.NurbsCurve.Create(False, 3, points),
+        "degree5": r3d.NurbsCurve.Create(False, 5, points),
+        "periodic": r3d.NurbsCurve.Create(True, 3, points),
+        "circle": circle.ToNurbsCurve(),
+        "arc": arc.ToNurbsCurve(),
+    }
+
+
+@pytest.mark.parametrize("name", ["degree1", "degree3", "degree5", "periodic", "circle", "arc"])
+def test_evaluate_matches_point_at(name):
+    from import_3dm.converters import nurbs
+
+    nc = _curves()[name]
+    t0, t1 = nc.Domain.T0, nc.Domain.T1
+    params = np.concatenate((np.linspace(t0, t1, 1001), [nc.Knots[i] for i in range(len(nc.Knots))]))
+
+    result = nurbs.evaluate(nurbs.from_rhino(nc), params)
+    expected = np.array([(p.X, p.Y, p.Z) for p in map(nc.PointAt, params)])
+
+    assert np.abs(result - expected).max() < 1e-9
@@ -0,0 +1,64 @@
+#!python3
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import addon_utils
+import rhino3dm as r3d
+
+
+@pytest.fixture(scope="session", autouse=True)
+def enable_addon():
+    addon_utils.enable("import_3dm")
+
+
+def _square(lo, hi):
+    return np.array([(lo, lo), (hi, lo), (hi, hi), (lo, hi)], dtype=np.float64)
+
+
+def _trim(lo, hi):
+    # trims live in surface parameter space
+    points = [r3d.Point3d(u, v, 0.0) for u, v in _square(lo, hi)]
+    points.append(points[0])
+    nc = r3d.PolylineCurve(points).ToNurbsCurve()
+    return SimpleNamespace(ToNurbsCurve=lambda: nc)
+
+
+def _planar_face(loops):
+    plane = r3d.Plane.WorldXY()
+    ns = r3d.PlaneSurface(plane, r3d.Interval(0.0, 10.0), r3d.Interval(0.0, 10.0)).ToNurbsSurface()
+    return SimpleNamespace(ToNurbsSurface=lambda: ns, Loops=loops, OrientationIsReversed=False)
+
+
+def _area(vertices, triangles):
+    a = vertices[triangles[:, 1]] - vertices[triangles[:, 0]]
+    b = vertices[triangles[:, 2]] - vertices[triangles[:, 0]]
+    return 0.5 * np.linalg.norm(np.cross(a, b), axis=1).sum()
+
+
+def test_inside_even_odd():
+    from import_3dm.converters import tessellate
+
+    polygons = [_square(0.0, 10.0), _square(4.0, 6.0)]
+    points = np.array([(1.0, 1.0), (5.0, 5.0), (11.0, 5.0), (3.9, 5.0), (6.1, 5.0)])
+    assert tessellate.inside(points, polygons).tolist() == [True, False, False, True, True]
+
+
+def test_untrimmed_face_covers_domain():
+    from import_3dm.converters import tessellate
+
+    vertices, triangles, uvs = tessellate.tessellate_face(_planar_face(None), 0.01, 0.35)
+    assert _area(vertices, triangles) == pytest.approx(100.0)
+    assert uvs.min() == pytest.approx(0.0) and uvs.max() == pytest.approx(1.0)
+
+
+def test_trimmed_face_has_hole():
+    from import_3dm.converters import tessellate
+
+    loops = [SimpleNamespace(Trims=[_trim(0.0, 10.0)]), SimpleNamespace(Trims=[_trim(4.0, 6.0)])]
+    vertices, triangles, _ = tessellate.tessellate_face(_planar_face(loops), 0.01, 0.35)
+    centers = vertices[triangles].mean(axis=1)[:, :2]
+    assert not np.any(np.all((centers > 4.0) & (centers < 6.0), axis=1))
+    # grid lines run through the trim vertices
+    assert _area(vertices, triangles) == pytest.approx(96.0)
@@ -0,0 +1,51 @@
+#!python3
+import numpy as np
+import pytest
+
+import bpy
+import addon_utils
+
+
+@pytest.fixture(scope="session", autouse=True)
+def enable_addon():
+    addon_utils.enable("import_3dm")
+
+
+def _text_curve_bounds(txt, size, align_x, align_y):
+    curve = bpy.data.curves.new(name="reference", type="FONT")
+    curve.body = txt
+    curve.size = size
+    curve.align_x = align_x
+    curve.align_y = align_y
+    ob = bpy.data.objects.new("reference", curve)
+    mesh = bpy.data.meshes.new_from_object(ob)
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    bpy.data.meshes.remove(mesh)
+    bpy.data.objects.remove(ob)
+    bpy.data.curves.remove(curve)
+    co = co.reshape(-1, 3)
+    return co.min(axis=0), co.max(axis=0)
+
+
+@pytest.mark.parametrize("align_x,align_y", [("CENTER", "TOP_BASELINE"), ("LEFT", "TOP_BASELINE"), ("CENTER", "TOP")])
+def test_label_matches_text_curve(align_x, align_y):
+    from import_3dm.converters import text
+
+    text.clear_glyph_cache()
+    vertices, loop_vertices, loop_totals = text.label_mesh("12.50 mm", 0.8, align_x, align_y)
+    lo, hi = _text_curve_bounds("12.50 mm", 0.8, align_x, align_y)
+
+    assert loop_totals.sum() == len(loop_vertices)
+    assert loop_vertices.max() < len(vertices)
+    # kerning of the built-in font is not applied to glyph labels
+    assert np.allclose(vertices.min(axis=0), lo, atol=0.05)
+    assert np.allclose(vertices.max(axis=0), hi, atol=0.05)
+
+
+def test_glyphs_are_cached():
+    from import_3dm.converters import text
+
+    text.clear_glyph_cache()
+    text.label_mesh("1111", 1.0, "LEFT", "TOP_BASELINE")
+    assert len(text._glyph_cache) == 1